@@ -0,0 +1,15 @@
+# Port scheme shared by the game software and the traffic tools. Kept free of
+# pygame and database imports so trafficSwarm can use it on its own.
+
+# Arena 0 receives hits on HIT_PORT and sends codes and ACKs to CODE_PORT.
+CODE_PORT = 7500
+HIT_PORT = CODE_PORT + 1
+
+def arena_ports(index, base_port=CODE_PORT):
+    """
+    Returns the (code_port, game_port) pair for arena index. Arena 0 uses the
+    standard 7500/7501 pair; each following arena uses the next two ports.
+    Codes and ACKs go to code_port and hits arrive on game_port.
+    """
+    code_port = base_port + 2 * index
+    return code_port, code_port + 1
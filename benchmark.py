@@ -0,0 +1,265 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import sys
+import threading
+import time
+
+# Run headless: no window and no sound card are needed.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import gameLog
+import gameScreen
+import gameStartTimer
+from gameEngine import GameEngine, make_teams, update_individual_scores
+from hit_message import encode_hit
+from roster import build_roster_index
+from scoreboard import Scoreboard
+from textCache import get_font, text_cache
+from udp_receiver import parse_acks
+from stats import summarize, LatencyTracker
+
+SCREEN_SIZE = (1024, 768)
+DEFAULT_SIZES = (4, 16, 64, 256, 512)
+# Hits applied between frames in the drawing benchmarks, so rows and scores
+# change every frame as they do in a busy match.
+HITS_PER_FRAME = 5
+# Most messages the ingest feeder keeps unacknowledged at once, so the
+# receive buffer is never overrun and nothing is lost.
+INGEST_WINDOW = 500
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the log messages of the code under test."""
+    root = logging.getLogger(gameLog.ROOT_LOGGER)
+    level = root.level
+    gameLog.set_level(logging.WARNING)
+    try:
+        yield
+    finally:
+        gameLog.set_level(level)
+
+def timed(fn, repeat):
+    """Calls fn repeat times and returns a summary of the per-call times in seconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    summary = summarize(samples)
+    summary["mean"] = sum(samples) / len(samples)
+    return summary
+
+def bench_scoring(size, events):
+    """Per-event cost of update_individual_scores with a roster index and scoreboard."""
+    green, red = make_teams(size // 2)
+    index = build_roster_index(green, red)
+    scoreboard = Scoreboard(green, red)
+    rng = random.Random(size)
+    equipment = [p["equipment"] for p in green + red]
+    hits = [(rng.choice(equipment), rng.choice(equipment)) for _ in range(events)]
+    with quiet():
+        started = time.perf_counter()
+        for shooter, target in hits:
+            update_individual_scores(shooter, target, green, red, index, scoreboard)
+        elapsed = time.perf_counter() - started
+    return {"events": events, "seconds": elapsed, "per_event_us": elapsed / events * 1e6}
+
+def bench_draw(size, frames):
+    """Per-frame cost of draw_team_section and draw_play_by_play at a roster size."""
+    surface = pygame.Surface(SCREEN_SIZE)
+    font = get_font(36)
+    width, height = SCREEN_SIZE
+    left = pygame.Rect(0, 0, width // 3, height)
+    center = pygame.Rect(width // 3, 0, width // 3, height)
+    green, red = make_teams(size // 2)
+    engine = GameEngine(green, red, history=50)
+    panel = gameScreen.PlayByPlayPanel(center, engine.events)
+    rng = random.Random(size)
+    equipment = [p["equipment"] for p in green + red]
+
+    def play():
+        for _ in range(HITS_PER_FRAME):
+            engine.apply_hit(rng.choice(equipment), rng.choice(equipment))
+
+    def team_section():
+        play()
+        gameScreen.draw_team_section(surface, left, (0, 128, 0), (0, 100, 0), green, font, (255, 255, 255),
+                                     sorted_team=engine.scoreboard.ranking("green"),
+                                     cumulative_score=engine.scoreboard.total("green"))
+
+    def team_section_unsorted():
+        play()
+        gameScreen.draw_team_section(surface, left, (0, 128, 0), (0, 100, 0), green, font, (255, 255, 255))
+
+    def play_by_play():
+        play()
+        gameScreen.draw_play_by_play(surface, panel, center)
+
+    with quiet():
+        return {
+            "draw_team_section": timed(team_section, frames),
+            "draw_team_section_unsorted": timed(team_section_unsorted, frames),
+            "draw_play_by_play": timed(play_by_play, frames),
+        }
+
+def bench_countdown_assets(repeat):
+    """Time to load the countdown images and background."""
+    def load():
+        gameStartTimer.load_images()
+        pygame.image.load("countdown_images/background.tif")
+    return timed(load, repeat)
+
+def bench_ingest(screen, messages, binary, players_per_team=10):
+    """
+    Messages per second through show_game_screen: a feeder thread sends hits
+    over loopback to the game socket, keeping at most INGEST_WINDOW of them
+    unacknowledged, and the run ends once every hit has been scored.
+    Includes the arrival-to-scored/displayed latency recorded by the game screen.
+    """
+    green, red = make_teams(players_per_team)
+    ack_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    ack_socket.bind(gameScreen.ACK_ADDRESS)
+    ack_socket.settimeout(0.5)
+    with quiet():
+        game_socket = gameScreen.init_udp_socket()
+    result = {}
+    latency = LatencyTracker()
+
+    def hits_scored():
+        # Base events are worth 100 and happen once per player; every hit
+        # here is between opposing players and worth 10.
+        points = sum(p.get("points", 0) for p in green + red)
+        bases = sum(1 for p in green + red if p.get("hit_base"))
+        return (points - 100 * bases) // 10
+
+    def feeder():
+        rng = random.Random(messages)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        acked = 0
+        sent = 0
+        started = time.perf_counter()
+        try:
+            while sent < messages:
+                while sent < messages and sent - acked < INGEST_WINDOW:
+                    shooter, target = rng.choice(green), rng.choice(red)
+                    seq = sent + 1
+                    if binary:
+                        payload = encode_hit(shooter["equipment"], target["equipment"], seq)
+                    else:
+                        payload = f"{shooter['equipment']}:{target['equipment']}".encode()
+                    sender.sendto(payload, ("127.0.0.1", 7501))
+                    sent += 1
+                try:
+                    data, _ = ack_socket.recvfrom(1024)
+                except socket.timeout:
+                    continue
+                acked += len(parse_acks(data.decode("utf-8", errors="replace"))) or 1
+            deadline = time.perf_counter() + 10
+            while hits_scored() < messages and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            elapsed = time.perf_counter() - started
+            result.update({"messages": messages, "scored": hits_scored(), "seconds": elapsed,
+                           "messages_per_second": messages / elapsed})
+        finally:
+            sender.close()
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    thread = threading.Thread(target=feeder, daemon=True)
+    thread.start()
+    try:
+        with quiet():
+            gameScreen.show_game_screen(screen, green, red, "127.0.0.1", game_socket, latency=latency)
+    finally:
+        thread.join()
+        ack_socket.close()
+    result["latency"] = latency.summary()
+    return result
+
+def run(sizes, events, frames, messages, repeat):
+    results = {"scoring": {}, "draw": {}}
+    for size in sizes:
+        results["scoring"][str(size)] = bench_scoring(size, events)
+        results["draw"][str(size)] = bench_draw(size, frames)
+    results["countdown_assets"] = bench_countdown_assets(repeat)
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    results["ingest"] = {
+        "text": bench_ingest(screen, messages, binary=False),
+        "binary": bench_ingest(screen, messages, binary=True),
+    }
+    results["text_cache"] = text_cache.stats()
+    return results
+
+def print_results(results):
+    for fmt, r in results["ingest"].items():
+        print(f"ingest ({fmt}): {r['messages_per_second']:,.0f} messages/s "
+              f"({r['scored']}/{r['messages']} scored in {r['seconds']:.2f} s), "
+              f"arrival -> displayed p99 {r['latency']['displayed']['p99'] * 1000:.1f} ms")
+    for size, r in results["scoring"].items():
+        print(f"update_individual_scores, {size} players: {r['per_event_us']:.2f} us/event")
+    for size, r in results["draw"].items():
+        costs = ", ".join(f"{name} {summary['mean'] * 1000:.3f} ms" for name, summary in r.items())
+        print(f"draw, {size} players: {costs}")
+    print(f"countdown assets: {results['countdown_assets']['mean'] * 1000:.1f} ms")
+
+def compare(results, baseline):
+    """Prints the ratio of each headline number to a previous results file."""
+    def headline(r):
+        numbers = {f"ingest.{fmt}.messages_per_second": v["messages_per_second"] for fmt, v in r["ingest"].items()}
+        numbers.update({f"scoring.{size}.per_event_us": v["per_event_us"] for size, v in r["scoring"].items()})
+        for size, draws in r["draw"].items():
+            numbers.update({f"draw.{size}.{name}.mean": v["mean"] for name, v in draws.items()})
+        numbers["countdown_assets.mean"] = r["countdown_assets"]["mean"]
+        return numbers
+    old = headline(baseline["results"])
+    for key, value in headline(results).items():
+        if old.get(key):
+            print(f"{key}: {value / old[key]:.2f}x baseline")
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for ingest, scoring and rendering.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated total roster sizes (default 4,16,64,256,512)")
+    parser.add_argument("--events", type=int, default=100000, help="hits per scoring benchmark")
+    parser.add_argument("--frames", type=int, default=300, help="frames per drawing benchmark")
+    parser.add_argument("--messages", type=int, default=20000, help="messages per ingest benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of the asset loading benchmark")
+    parser.add_argument("--output", default="benchmark-results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    # Asset paths are relative to the repository.
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    pygame.init()
+    pygame.display.set_mode(SCREEN_SIZE)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    results = run(sizes, args.events, args.frames, args.messages, args.repeat)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "options": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print_results(results)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
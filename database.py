@@ -1,5 +1,22 @@
+import argparse
+import csv
+import io
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 import psycopg2
 from psycopg2 import sql
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import execute_values
+
+from gameLog import get_logger
+
+log = get_logger("database")
 
 # -----------------------
 # Connection Parameters
@@ -9,9 +26,134 @@ connection_params = {
     'user': 'student',
     'password': 'student',  
     'host': 'localhost',
-    'port': '5432'
+    'port': '5432',
+    # Fail instead of hanging when the server is unreachable.
+    'connect_timeout': 5
 }
 
+# -----------------------
+# Connection Pool
+# -----------------------
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 5
+# Connections idle for longer than this are checked with a cheap query
+# before being handed out, and replaced if the server has dropped them.
+HEALTH_CHECK_IDLE_SECONDS = 30
+
+_pool = None
+# _pool_lock only guards swapping _pool in and out. _connect_lock keeps
+# background threads from connecting at the same time; the UI thread never
+# takes it, so a slow or silent server cannot block it.
+_pool_lock = threading.Lock()
+_connect_lock = threading.Lock()
+_last_used = {}
+
+def init_pool(minconn=POOL_MIN_SIZE, maxconn=POOL_MAX_SIZE, params=None):
+    """
+    Opens the shared connection pool (if it is not already open) and makes
+    sure the players, games and game_events tables exist. The schema check
+    runs once per pool.
+    Raises psycopg2.Error if the database cannot be reached; the next call
+    (or pooled_connection()) will try again.
+    """
+    global _pool
+    with _connect_lock:
+        if _pool is not None:
+            return _pool
+        new_pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, **(params or connection_params))
+        conn = new_pool.getconn()
+        try:
+            cursor = conn.cursor()
+            create_table_if_not_exists(cursor)
+            create_game_tables_if_not_exists(cursor)
+            conn.commit()
+            cursor.close()
+        except psycopg2.Error:
+            new_pool.putconn(conn)
+            new_pool.closeall()
+            raise
+        new_pool.putconn(conn)
+        with _pool_lock:
+            _pool = new_pool
+        return new_pool
+
+def close_pool():
+    """Closes every pooled connection."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _last_used.clear()
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+    if time.monotonic() - _last_used.get(id(conn), 0) < HEALTH_CHECK_IDLE_SECONDS:
+        return True
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1;")
+        cursor.close()
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrows a connection from the shared pool for the duration of a with block.
+    Broken connections are discarded and replaced (reconnecting if needed).
+    The caller commits; anything left uncommitted is rolled back on return.
+    """
+    db_pool = _pool or init_pool()
+    conn = db_pool.getconn()
+    if not _is_healthy(conn):
+        db_pool.putconn(conn, close=True)
+        _last_used.pop(id(conn), None)
+        conn = db_pool.getconn()
+    try:
+        yield conn
+    finally:
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+        _last_used[id(conn)] = time.monotonic()
+        db_pool.putconn(conn, close=bool(conn.closed))
+
+# -----------------------
+# Background Worker
+# -----------------------
+class DatabaseWorker:
+    """
+    Runs database calls on background threads so the pygame UI thread never
+    waits on Postgres. submit() queues a call and returns a
+    concurrent.futures.Future; the UI polls it and applies the result once
+    it is done.
+    """
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+
+    def submit(self, fn, *args, **kwargs):
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def get_worker():
+    """Returns the shared DatabaseWorker, starting it on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = DatabaseWorker()
+        return _worker
+
 # -----------------------
 # Helper Functions
 # -----------------------
@@ -25,6 +167,29 @@ def create_table_if_not_exists(cursor):
     """
     cursor.execute(create_table_query)
 
+def create_game_tables_if_not_exists(cursor):
+    """Create the games and game_events tables used for match history."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS games (
+        id SERIAL PRIMARY KEY,
+        started_at TIMESTAMPTZ NOT NULL,
+        ended_at TIMESTAMPTZ,
+        green_score INT,
+        red_score INT
+    );
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS game_events (
+        id BIGSERIAL PRIMARY KEY,
+        game_id INT NOT NULL REFERENCES games (id),
+        occurred_at TIMESTAMPTZ NOT NULL,
+        shooter INT,
+        target INT,
+        code INT NOT NULL,
+        points_delta INT NOT NULL
+    );
+    """)
+
 def check_player_exists(cursor, player_id):
     """Check if a player with the given ID exists in the database."""
     cursor.execute("SELECT codename FROM players WHERE id = %s;", (player_id,))
@@ -34,19 +199,390 @@ def insert_player(cursor, player_id, codename):
     """Insert a new player into the database."""
     cursor.execute("INSERT INTO players (id, codename) VALUES (%s, %s);", (player_id, codename))
 
+def update_player_codename(cursor, player_id, codename):
+    """Change the codename of an existing player."""
+    cursor.execute("UPDATE players SET codename = %s WHERE id = %s;", (codename, player_id))
+
+def save_player(player_id, codename):
+    """
+    Stores a player's codename, inserting the player if they are new.
+    Returns an error message for the entry screen, or None on success.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        result = check_player_exists(cursor, player_id)
+        if result:
+            if codename != result[0]:
+                update_player_codename(cursor, player_id, codename)
+                conn.commit()
+        else:
+            if codename == "":
+                cursor.close()
+                return "Codename cannot be empty."
+            insert_player(cursor, player_id, codename)
+            conn.commit()
+        cursor.close()
+    return None
+
+def get_codename(player_id):
+    """Returns the stored codename for a player ID, or None if the player is new."""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        result = check_player_exists(cursor, player_id)
+        cursor.close()
+    return result[0] if result else None
+
+def upsert_players(cursor, rows):
+    """Insert or update many (id, codename) rows in one statement per page."""
+    execute_values(cursor,
+                   "INSERT INTO players (id, codename) VALUES %s "
+                   "ON CONFLICT (id) DO UPDATE SET codename = EXCLUDED.codename;",
+                   rows)
+
+# -----------------------
+# Bulk Roster Import
+# -----------------------
+def read_roster_file(path):
+    """
+    Reads a roster from a CSV file (with a header row) or a JSON file
+    (a list of objects). Each entry needs "id" and "codename" and may also
+    give "equipment" and "team" ("green" or "red").
+    Returns a list of dicts with id/equipment as ints; raises ValueError on
+    a malformed entry.
+    """
+    with open(path, newline="") as f:
+        if os.path.splitext(path)[1].lower() == ".json":
+            entries = json.load(f)
+        else:
+            entries = list(csv.DictReader(f))
+    if not isinstance(entries, list):
+        raise ValueError("A JSON roster must be a list of objects.")
+    roster = []
+    for line, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Entry {line}: expected an object with id and codename.")
+        player_id = str(entry.get("id", "")).strip()
+        codename = str(entry.get("codename") or "").strip()
+        equipment = str(entry.get("equipment") or "").strip()
+        team = str(entry.get("team") or "").strip().lower()
+        if not player_id.isdigit():
+            raise ValueError(f"Entry {line}: player ID must be an integer.")
+        if not codename:
+            raise ValueError(f"Entry {line}: codename cannot be empty.")
+        if len(codename) > 30:
+            raise ValueError(f"Entry {line}: codename is longer than 30 characters.")
+        if equipment and not equipment.isdigit():
+            raise ValueError(f"Entry {line}: equipment ID must be an integer.")
+        if team and team not in ("green", "red"):
+            raise ValueError(f"Entry {line}: team must be 'green' or 'red'.")
+        roster.append({
+            "id": int(player_id),
+            "codename": codename,
+            "equipment": int(equipment) if equipment else None,
+            "team": team or None,
+        })
+    return roster
+
+def import_players(roster):
+    """
+    Upserts every (id, codename) in the roster. The rows are streamed into a
+    temporary table with COPY and merged with a single INSERT ... ON CONFLICT,
+    so hundreds of players cost one round trip instead of one per player.
+    Returns the number of rows imported.
+    """
+    # Later entries for the same ID win, as they would with one-by-one updates.
+    rows = {entry["id"]: entry["codename"] for entry in roster}
+    buffer = io.StringIO()
+    for player_id, codename in rows.items():
+        escaped = codename.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+        buffer.write(f"{player_id}\t{escaped}\n")
+    buffer.seek(0)
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE players_import (id INT, codename VARCHAR(30)) ON COMMIT DROP;")
+        cursor.copy_expert("COPY players_import (id, codename) FROM STDIN;", buffer)
+        cursor.execute("INSERT INTO players (id, codename) SELECT id, codename FROM players_import "
+                       "ON CONFLICT (id) DO UPDATE SET codename = EXCLUDED.codename;")
+        conn.commit()
+        cursor.close()
+    return len(rows)
+
+# -----------------------
+# Codename Cache
+# -----------------------
+# A failed preload is retried after this long, doubling up to the maximum.
+LOAD_RETRY_SECONDS = 1.0
+LOAD_RETRY_MAX_SECONDS = 30.0
+
+class CodenameCache:
+    """
+    In-memory copy of the players table so the entry screen can look up and
+    store codenames without a database round trip.
+
+    start() bulk-loads the table on a background thread, retrying with
+    backoff while the database is unreachable. Until that succeeds
+    is_loaded() is False and callers should fall back to the database.
+    Writes are applied to the cache immediately and flushed to Postgres in
+    batches by a background thread (write-behind); a failed flush is kept and
+    retried, so entry keeps working through short database outages.
+    """
+    def __init__(self, flush_interval=1.0):
+        self.flush_interval = flush_interval
+        self._codenames = {}
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._flusher = None
+        self.flushed = 0
+        self.flush_errors = 0
+
+    def start(self):
+        """Starts the write-behind thread, which also loads the table."""
+        self._flusher = threading.Thread(target=self._run_flusher, name="codename-flush", daemon=True)
+        self._flusher.start()
+
+    def load(self):
+        """Reads the whole players table into the cache."""
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, codename FROM players;")
+            rows = cursor.fetchall()
+            cursor.close()
+        with self._lock:
+            for player_id, codename in rows:
+                # Anything written while the load was running is newer.
+                self._codenames.setdefault(player_id, codename)
+        self._loaded.set()
+        log.info("Loaded %d codenames into the cache", len(rows))
+
+    def is_loaded(self):
+        return self._loaded.is_set()
+
+    def get(self, player_id):
+        """Returns the cached codename for a player ID, or None if the player is new."""
+        with self._lock:
+            return self._codenames.get(player_id)
+
+    def remember(self, player_id, codename):
+        """Records a codename that is already stored in the database."""
+        with self._lock:
+            self._codenames[player_id] = codename
+
+    def save(self, player_id, codename):
+        """
+        Stores a player's codename, like database.save_player(), but in the
+        cache now and in the database on the next flush.
+        Returns an error message for the entry screen, or None on success.
+        """
+        with self._lock:
+            existing = self._codenames.get(player_id)
+            if existing is None and codename == "":
+                return "Codename cannot be empty."
+            if existing == codename:
+                return None
+            self._codenames[player_id] = codename
+            self._dirty[player_id] = codename
+        return None
+
+    def flush(self):
+        """Writes all pending changes to the database in one batch."""
+        with self._lock:
+            pending = self._dirty
+            self._dirty = {}
+        if not pending:
+            return 0
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                upsert_players(cursor, list(pending.items()))
+                conn.commit()
+                cursor.close()
+        except psycopg2.Error as e:
+            self.flush_errors += 1
+            log.warning("Codename flush failed, will retry: %s", e)
+            with self._lock:
+                # Keep anything written since the snapshot; it is newer.
+                for player_id, codename in pending.items():
+                    self._dirty.setdefault(player_id, codename)
+            return 0
+        self.flushed += len(pending)
+        return len(pending)
+
+    def _run_flusher(self):
+        retry_at = 0.0
+        backoff = LOAD_RETRY_SECONDS
+        while not self._stopping.is_set():
+            if not self.is_loaded() and time.monotonic() >= retry_at:
+                try:
+                    self.load()
+                except psycopg2.Error as e:
+                    log.warning("Could not preload codenames, retrying in %g s: %s", backoff, e)
+                    retry_at = time.monotonic() + backoff
+                    backoff = min(backoff * 2, LOAD_RETRY_MAX_SECONDS)
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def stop(self, timeout=5.0):
+        """Stops the write-behind thread after a final flush."""
+        self._stopping.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout)
+        self.flush()
+
+# -----------------------
+# Game Event Log
+# -----------------------
+def _equipment_number(equip):
+    text = str(equip).strip() if equip is not None else ""
+    return int(text) if text.isdigit() else None
+
+class GameEventLog:
+    """
+    Records one match in the games table and every scoring event in
+    game_events without making the game loop wait on the database.
+
+    record() only appends to a bounded in-memory queue (events are dropped
+    and counted if it is full). A background thread creates the games row,
+    then inserts whatever has queued up in one batch every flush_interval
+    seconds, and on finish() writes the end time and final team scores.
+    If the database is unavailable, events are kept and retried.
+    """
+    def __init__(self, flush_interval=1.0, max_queue=100000):
+        self.flush_interval = flush_interval
+        self.game_id = None
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = []
+        self._final_scores = None
+        self._finished = threading.Event()
+        self._thread = None
+
+    def start(self, started_at=None):
+        """Starts logging a new game."""
+        self._started_at = started_at or time.time()
+        self._thread = threading.Thread(target=self._run, name="game-event-log", daemon=True)
+        self._thread.start()
+
+    def record(self, shooter, target, code, points_delta, occurred_at=None):
+        """
+        Queues a scoring event. shooter/target are equipment IDs (None if not
+        applicable), code is 0 for a player hit or the base code (43 / 53).
+        """
+        event = (occurred_at or time.time(), _equipment_number(shooter), _equipment_number(target),
+                 code, points_delta)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def finish(self, green_score, red_score):
+        """
+        Records the final scores and tells the writer to write any remaining
+        events and stop. Does not wait for it; see wait().
+        """
+        if self._finished.is_set():
+            return
+        self._final_scores = (time.time(), green_score, red_score)
+        self._finished.set()
+
+    def wait(self, timeout=None):
+        """Waits for the writer to finish after finish() has been called."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            finishing = self._finished.wait(self.flush_interval)
+            try:
+                self._write(finishing)
+            except psycopg2.Error as e:
+                self.write_errors += 1
+                log.warning("Game event log write failed, will retry: %s", e)
+                if finishing:
+                    log.error("Game event log gave up with %d unwritten events", len(self._pending))
+                    return
+                continue
+            if finishing:
+                log.info("Game %s logged: %d events written, %d dropped", self.game_id, self.written, self.dropped)
+                return
+
+    def _write(self, finishing):
+        while True:
+            try:
+                self._pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if self.game_id is not None and not self._pending and not finishing:
+            return
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            # The games row only exists once the transaction that inserted it
+            # commits, so game_id is not kept until then.
+            game_id = self.game_id
+            if game_id is None:
+                cursor.execute("INSERT INTO games (started_at) VALUES (to_timestamp(%s)) RETURNING id;",
+                               (self._started_at,))
+                game_id = cursor.fetchone()[0]
+            if self._pending:
+                execute_values(cursor,
+                               "INSERT INTO game_events (game_id, occurred_at, shooter, target, code, points_delta) "
+                               "VALUES %s;",
+                               [(game_id,) + event for event in self._pending],
+                               template="(%s, to_timestamp(%s), %s, %s, %s, %s)")
+            if finishing and self._final_scores is not None:
+                cursor.execute("UPDATE games SET ended_at = to_timestamp(%s), green_score = %s, red_score = %s "
+                               "WHERE id = %s;", self._final_scores + (game_id,))
+            conn.commit()
+            cursor.close()
+        self.game_id = game_id
+        self.written += len(self._pending)
+        self._pending = []
+
 # -----------------------
 # Main Program
 # -----------------------
 def main():
+    parser = argparse.ArgumentParser(description="Manage the players table.")
+    subparsers = parser.add_subparsers(dest="command")
+    import_parser = subparsers.add_parser("import", help="bulk import players from a CSV or JSON roster")
+    import_parser.add_argument("path", help="roster file with id and codename (and optionally equipment, team)")
+    args = parser.parse_args()
+    if args.command == "import":
+        import_roster_command(args.path)
+        return
+    try:
+        # Borrow a connection from the pool (this also creates the table if needed)
+        init_pool()
+        with pooled_connection() as conn:
+            run_interactive(conn)
+    
+    except Exception as error:
+        print(f"Error connecting to PostgreSQL database: {error}")
+    
+    finally:
+        close_pool()
+
+def import_roster_command(path):
+    try:
+        roster = read_roster_file(path)
+        count = import_players(roster)
+        print(f"Imported {count} players from {path}")
+    except (OSError, ValueError) as error:
+        print(f"Could not read roster: {error}")
+    except psycopg2.Error as error:
+        print(f"Error importing into PostgreSQL database: {error}")
+    finally:
+        close_pool()
+
+def run_interactive(conn):
+    cursor = conn.cursor()
     try:
-        # Connect to the PostgreSQL database
-        conn = psycopg2.connect(**connection_params)
-        cursor = conn.cursor()
-        
-        # Create the table if it does not exist
-        create_table_if_not_exists(cursor)
-        conn.commit()
-        
         # Loop to process two players
         for i in range(2):
             player_id_input = input(f"Enter Player {i+1} ID: ").strip()
@@ -75,14 +611,8 @@ def main():
         for row in rows:
             print(row)
     
-    except Exception as error:
-        print(f"Error connecting to PostgreSQL database: {error}")
-    
     finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
+        cursor.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,42 @@
+class EventRing:
+    """
+    Fixed-capacity ring buffer of compact play-by-play records.
+    Appending overwrites the oldest record once the buffer is full, so the
+    cost of an event does not depend on how many have come before it.
+    Records are small tuples, e.g. ("hit", shooter_name, target_name) or
+    ("base", player_name, None); see format_event().
+    """
+    def __init__(self, capacity=50):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._next = 0
+        # Total number of records ever appended; used to find what is new.
+        self.total = 0
+
+    def append(self, record):
+        self._slots[self._next] = record
+        self._next = (self._next + 1) % self.capacity
+        self.total += 1
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def latest(self, count):
+        """Returns up to count of the most recent records, oldest first."""
+        count = min(count, len(self))
+        start = self._next - count
+        if start >= 0:
+            return self._slots[start:self._next]
+        return self._slots[start:] + self._slots[:self._next]
+
+    def __iter__(self):
+        return iter(self.latest(self.capacity))
+
+def format_event(record):
+    """Returns the play-by-play text for an event record."""
+    kind, actor, target = record
+    if kind == "hit":
+        return f"{actor} hit {target}"
+    if kind == "base":
+        return f"{actor} triggered a base hit"
+    return f"{actor} {kind} {target}"
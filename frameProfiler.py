@@ -0,0 +1,169 @@
+import csv
+import time
+from collections import deque
+
+import pygame
+
+from stats import summarize
+
+# Key that shows or hides the profiling overlay.
+PROFILER_HOTKEY = pygame.K_F9
+
+# Phases spent waiting for the next frame rather than working. They are
+# left out of a frame's busy time, which is what the histogram shows.
+IDLE_PHASES = ("wait",)
+
+# Upper edges (in milliseconds) of the busy-time histogram buckets; the last
+# bucket holds everything slower. 33 ms is one frame at 30 FPS.
+HISTOGRAM_EDGES_MS = (2, 4, 8, 16, 33, 66)
+
+# Frames kept for the CSV export (one hour at 30 FPS); older frames are dropped.
+MAX_RECORDED_FRAMES = 30 * 60 * 60
+
+OVERLAY_BG = (0, 0, 0, 200)
+OVERLAY_PADDING = 6
+# The overlay text is re-rendered this often rather than every frame.
+OVERLAY_REFRESH_FRAMES = 15
+
+class FrameProfiler:
+    """
+    Times the phases of a render loop.
+
+    Call begin_frame() at the top of the loop, mark(phase) at the end of each
+    phase (the time since the previous mark is charged to that phase) and
+    end_frame() once the frame is done. The last window frames are kept for
+    the rolling percentiles and busy-time histogram shown by draw_overlay(),
+    and every frame is recorded for dump_csv().
+    """
+    def __init__(self, name, window=300):
+        self.name = name
+        self.window = window
+        self.phases = []
+        self.visible = False
+        self.frames = 0
+        self._samples = {}
+        self._totals = deque(maxlen=window)
+        self._busy = deque(maxlen=window)
+        self._recorded = deque(maxlen=MAX_RECORDED_FRAMES)
+        self._current = None
+        self._frame_start = None
+        self._last_mark = None
+        self._first_frame = None
+        self._overlay = None
+        self._font = None
+        self._overlay_frame = -OVERLAY_REFRESH_FRAMES
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._first_frame is None:
+            self._first_frame = now
+        self._frame_start = self._last_mark = now
+        self._current = {}
+
+    def mark(self, phase):
+        """Charges the time since the last mark (or the frame start) to phase."""
+        if self._current is None:
+            return
+        now = time.perf_counter()
+        self._current[phase] = self._current.get(phase, 0.0) + now - self._last_mark
+        self._last_mark = now
+
+    def discard_frame(self):
+        """Drops the frame in progress, e.g. one that ran a whole game from an event handler."""
+        self._current = None
+
+    def end_frame(self):
+        if self._current is None:
+            return
+        total = time.perf_counter() - self._frame_start
+        busy = total - sum(self._current.get(phase, 0.0) for phase in IDLE_PHASES)
+        for phase, seconds in self._current.items():
+            samples = self._samples.get(phase)
+            if samples is None:
+                self.phases.append(phase)
+                samples = self._samples[phase] = deque(maxlen=self.window)
+            samples.append(seconds)
+        self._totals.append(total)
+        self._busy.append(busy)
+        self._recorded.append((self.frames, self._frame_start - self._first_frame, total, busy, self._current))
+        self.frames += 1
+        self._current = None
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def summary(self, phase=None):
+        """
+        Rolling summarize() of one phase, of whole frames when phase is None,
+        or of busy time when phase is "busy".
+        """
+        if phase is None:
+            samples = self._totals
+        elif phase == "busy":
+            samples = self._busy
+        else:
+            samples = self._samples.get(phase, ())
+        return summarize(samples)
+
+    def histogram(self):
+        """Counts of recent busy times falling in each HISTOGRAM_EDGES_MS bucket (plus one for slower frames)."""
+        counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for busy in self._busy:
+            ms = busy * 1000
+            for i, edge in enumerate(HISTOGRAM_EDGES_MS):
+                if ms < edge:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    def overlay_lines(self):
+        lines = [f"{self.name} profile, last {len(self._totals)} frames (ms)",
+                 f"{'phase':<13}{'p50':>7}{'p95':>7}{'max':>7}"]
+        for phase in self.phases + ["busy", None]:
+            s = self.summary(phase)
+            if s["count"]:
+                lines.append(f"{phase or 'frame':<13}{s['p50'] * 1000:>7.2f}{s['p95'] * 1000:>7.2f}"
+                             f"{s['max'] * 1000:>7.2f}")
+        lines.append("busy time histogram")
+        counts = self.histogram()
+        labels = [f"<{edge}" for edge in HISTOGRAM_EDGES_MS] + [f">={HISTOGRAM_EDGES_MS[-1]}"]
+        most = max(counts) or 1
+        for label, count in zip(labels, counts):
+            lines.append(f"{label:>5} {'#' * round(20 * count / most):<20} {count}")
+        return lines
+
+    def draw_overlay(self, surface, font=None, topleft=(10, 10)):
+        """
+        Draws the overlay if it is visible and returns its rect (None when hidden).
+        The text is refreshed every OVERLAY_REFRESH_FRAMES frames. A small
+        monospace font is used unless another is given.
+        """
+        if not self.visible:
+            return None
+        if font is None:
+            font = self._font = self._font or pygame.font.SysFont("monospace", 16)
+        if self._overlay is None or self.frames - self._overlay_frame >= OVERLAY_REFRESH_FRAMES:
+            rendered = [font.render(line, True, (255, 255, 255)) for line in self.overlay_lines()]
+            width = max(line.get_width() for line in rendered) + 2 * OVERLAY_PADDING
+            height = font.get_linesize() * len(rendered) + 2 * OVERLAY_PADDING
+            self._overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+            self._overlay.fill(OVERLAY_BG)
+            for i, line in enumerate(rendered):
+                self._overlay.blit(line, (OVERLAY_PADDING, OVERLAY_PADDING + i * font.get_linesize()))
+            self._overlay_frame = self.frames
+        return surface.blit(self._overlay, topleft)
+
+    def dump_csv(self, path):
+        """
+        Writes one row per recorded frame: frame number, start time, total,
+        busy and per-phase milliseconds. Returns the number of frames written.
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "start_s", "total_ms", "busy_ms"] + [f"{phase}_ms" for phase in self.phases])
+            for frame, start, total, busy, phases in self._recorded:
+                writer.writerow([frame, f"{start:.6f}", f"{total * 1000:.3f}", f"{busy * 1000:.3f}"]
+                                + [f"{phases.get(phase, 0.0) * 1000:.3f}" for phase in self.phases])
+        return len(self._recorded)
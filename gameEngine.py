@@ -0,0 +1,218 @@
+import random
+import sys
+import time
+
+from roster import build_roster_index, lookup
+from scoreboard import Scoreboard
+from eventRing import EventRing
+from gameLog import get_logger
+from hit_message import CODE_HIT
+
+log = get_logger("gameEngine")
+
+GAME_DURATION = 6 * 60  # 6-minute game
+
+def report(message, *args):
+    """Logs a scoring message at DEBUG; it is only formatted when the trace is on."""
+    log.debug(message, *args)
+
+def add_points(player, team, delta, scoreboard=None):
+    """
+    Changes a player's points, going through the scoreboard when one is in use
+    so the team totals and ranking stay current.
+    """
+    if scoreboard is not None:
+        scoreboard.add_points(player, team, delta)
+    else:
+        player["points"] = player.get("points", 0) + delta
+
+def process_transmission(code, player, green_team, red_team, scoreboard=None):
+    """
+    Process a transmission code for scoring (base events only):
+      - Code 53: Green team player scores at Red Base.
+      - Code 43: Red team player scores at Green Base.
+    Updates the player's 'hit_base' status and points.
+    Returns the number of points awarded.
+    """
+    if code == 53 and player in green_team and not player.get('hit_base', False):
+        player['hit_base'] = True
+        add_points(player, "green", 100, scoreboard)
+        report("[CODE 53] %s scored on Red Base", player['codename'])
+        return 100
+    elif code == 43 and player in red_team and not player.get('hit_base', False):
+        player['hit_base'] = True
+        add_points(player, "red", 100, scoreboard)
+        report("[CODE 43] %s scored on Green Base", player['codename'])
+        return 100
+    return 0
+
+def get_codename_from_equipment(equip, green_team, red_team, roster_index=None):
+    """
+    Returns the codename of the player whose equipment ID matches the provided equip.
+    If not found, returns the equipment ID (as a string).
+    When a roster index is given, the player is found with a single lookup.
+    """
+    if roster_index is not None:
+        entry = lookup(roster_index, equip)
+        return entry[0].get("codename") if entry else str(equip)
+    for player in green_team + red_team:
+        if str(player.get("equipment")) == str(equip):
+            return player.get("codename")
+    return str(equip)
+
+def update_individual_scores(shooter_equip, target_equip, green_team, red_team, roster_index=None, scoreboard=None):
+    """
+    Updates the shooter's score based on a hit event.
+      - Adds 10 points for tagging an opposing player.
+      - Subtracts 10 points for tagging a teammate.
+    Returns the change in the shooter's points (0 if the hit was not scored).
+    """
+    if roster_index is None:
+        roster_index = build_roster_index(green_team, red_team)
+    shooter_entry = lookup(roster_index, shooter_equip)
+    target_entry = lookup(roster_index, target_equip)
+    if shooter_entry and target_entry:
+        shooter, shooter_team = shooter_entry
+        target, target_team = target_entry
+        if shooter_team != target_team:
+            add_points(shooter, shooter_team, 10, scoreboard)
+            report("%s (+10) on hitting opposing team %s", shooter['codename'], target['codename'])
+            return 10
+        else:
+            add_points(shooter, shooter_team, -10, scoreboard)
+            report("%s (-10) for tagging teammate %s", shooter['codename'], target['codename'])
+            return -10
+    return 0
+
+class ManualClock:
+    """A clock that only moves when told to, for replaying or simulating matches."""
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+class GameEngine:
+    """
+    Scoring for one match with no dependency on pygame.
+
+    The engine owns the roster index, the Scoreboard (team totals and
+    rankings), the base-hit state kept on the player records, and the
+    play-by-play history. It is fed parsed hit events and reads time from
+    clock, so the same engine drives the game screen in real time or a
+    headless replay as fast as the CPU allows. Base events it applies are
+    written to journal (a matchJournal.MatchJournal), if one is given, since
+    they do not arrive over the socket.
+    """
+    def __init__(self, green_team, red_team, roster_index=None, clock=time.monotonic, duration=GAME_DURATION,
+                 history=50, event_log=None, journal=None):
+        self.green_team = green_team
+        self.red_team = red_team
+        self.roster_index = roster_index if roster_index is not None else build_roster_index(green_team, red_team)
+        self.scoreboard = Scoreboard(green_team, red_team)
+        self.events = EventRing(history)
+        self.clock = clock
+        self.duration = duration
+        self.event_log = event_log
+        self.journal = journal
+        self.start_time = None
+        self.hits_processed = 0
+        self.finished = False
+
+    def start(self):
+        self.start_time = self.clock()
+
+    def time_left(self):
+        """Whole seconds remaining in the match."""
+        if self.start_time is None:
+            return self.duration
+        return max(0, self.duration - int(self.clock() - self.start_time))
+
+    def is_over(self):
+        return self.time_left() <= 0
+
+    def apply_hit(self, shooter_equip, target_equip, code=CODE_HIT):
+        """
+        Scores a "shooter hit target" event, adds it to the play-by-play
+        history and logs it. Returns the change in the shooter's points.
+        """
+        shooter_name = get_codename_from_equipment(shooter_equip, self.green_team, self.red_team, self.roster_index)
+        target_name = get_codename_from_equipment(target_equip, self.green_team, self.red_team, self.roster_index)
+        event = ("hit", shooter_name, target_name)
+        self.events.append(event)
+        report("Added event: %s hit %s", shooter_name, target_name)
+        delta = update_individual_scores(shooter_equip, target_equip, self.green_team, self.red_team,
+                                         self.roster_index, self.scoreboard)
+        self.hits_processed += 1
+        if self.event_log is not None:
+            self.event_log.record(shooter_equip, target_equip, code, delta)
+        return delta
+
+    def apply(self, transmission):
+        """Applies a udp_receiver.Transmission. Returns the points change."""
+        return self.apply_hit(transmission.shooter, transmission.target, transmission.code)
+
+    def apply_base(self, player, code):
+        """Scores a base event (code 53 or 43) for a player. Returns the points awarded."""
+        if self.journal is not None:
+            self.journal.write_base(player.get("equipment"), code)
+        delta = process_transmission(code, player, self.green_team, self.red_team, self.scoreboard)
+        self.events.append(("base", player['codename'], None))
+        if self.event_log is not None:
+            self.event_log.record(player.get("equipment"), None, code, delta)
+        return delta
+
+    def simulate_base_hit(self, rng=random):
+        """Triggers a base event for a random player (used by the game screen for testing)."""
+        all_players = self.green_team + self.red_team
+        if not all_players:
+            return 0
+        player = rng.choice(all_players)
+        code = 53 if player in self.green_team else 43
+        return self.apply_base(player, code)
+
+    def finish(self):
+        """Ends the match and records the final scores in the event log, if any."""
+        if self.finished:
+            return
+        self.finished = True
+        if self.event_log is not None:
+            self.event_log.finish(self.scoreboard.total("green"), self.scoreboard.total("red"))
+
+def make_teams(players_per_team):
+    """Builds two teams of synthetic players with equipment IDs 1..2n."""
+    green = [{"player_id": str(i), "codename": f"Green{i}", "equipment": str(i)}
+             for i in range(1, players_per_team + 1)]
+    red = [{"player_id": str(i), "codename": f"Red{i}", "equipment": str(i)}
+           for i in range(players_per_team + 1, 2 * players_per_team + 1)]
+    return green, red
+
+def simulate_match(players_per_team=10, hits=100000, seed=0):
+    """
+    Plays a random match through a headless engine with a manual clock and
+    returns (engine, seconds taken).
+    """
+    rng = random.Random(seed)
+    green, red = make_teams(players_per_team)
+    clock = ManualClock()
+    engine = GameEngine(green, red, clock=clock)
+    equipment = [p["equipment"] for p in green + red]
+    step = GAME_DURATION / max(hits, 1)
+    started = time.perf_counter()
+    engine.start()
+    for _ in range(hits):
+        engine.apply_hit(rng.choice(equipment), rng.choice(equipment))
+        clock.advance(step)
+    engine.finish()
+    return engine, time.perf_counter() - started
+
+if __name__ == "__main__":
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    hits = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    engine, elapsed = simulate_match(players, hits)
+    print(f"{hits} hits, {players} players per team: {elapsed:.3f} s "
+          f"({hits / elapsed:,.0f} hits/s)")
+    print(f"Final score: green {engine.scoreboard.total('green')}, red {engine.scoreboard.total('red')}")
@@ -0,0 +1,150 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+# All of the game's loggers live under this name, so one level setting
+# covers every module.
+ROOT_LOGGER = "lasertag"
+
+DEFAULT_LEVEL = logging.INFO
+# Per-datagram, per-ACK and per-scoring-event messages are logged at this
+# level; switching to it during a match turns on the verbose trace.
+TRACE_LEVEL = logging.DEBUG
+
+# Records waiting for the writer thread. When it falls this far behind,
+# new records are dropped and counted rather than blocking the caller.
+QUEUE_SIZE = 10000
+
+LOG_FORMAT = "%(asctime)s.%(msecs)03d %(levelname)-7s %(name)s: %(message)s"
+DATE_FORMAT = "%H:%M:%S"
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread through a bounded queue. Logging never
+    blocks: when the queue is full the record is dropped and counted.
+
+    Records are queued unformatted and formatted by the writer thread, so
+    arguments passed to a log call must not be changed afterwards.
+    """
+    def __init__(self, maxsize=QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # emit() runs under the handler lock, so the counter is safe.
+            self.dropped += 1
+
+class LogOutput(logging.StreamHandler):
+    """A StreamHandler that leaves flushing to the writer thread."""
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+class LogWriter(logging.handlers.QueueListener):
+    """
+    Writes queued records from a daemon thread, flushing the output whenever
+    it has caught up with the queue. stop() waits for the backlog to be written.
+    """
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+    def enqueue_sentinel(self):
+        # The queue may be full; wait for room rather than losing the sentinel.
+        self.queue.put(self._sentinel)
+
+_lock = threading.Lock()
+_queue_handler = None
+_output = None
+_writer = None
+
+def _start_writer():
+    global _writer
+    _writer = LogWriter(_queue_handler.queue, _output, respect_handler_level=True)
+    _writer.start()
+
+def _restart_in_child():
+    # A forked child (e.g. a trafficSwarm worker) gets a copy of the queue
+    # but not the writer thread, so it starts one of its own.
+    if _writer is not None:
+        _queue_handler.queue = queue.Queue(_queue_handler.queue.maxsize)
+        _start_writer()
+
+def configure(level=None, path=None, stream=None, queue_size=QUEUE_SIZE):
+    """
+    Sets up (or changes) the game's logging: level is a logging level or its
+    name, and records go to path when given and otherwise to stream
+    (stdout by default). Called with no arguments it only makes sure logging
+    is set up, with INFO to stdout.
+    """
+    global _queue_handler, _output
+    with _lock:
+        root = logging.getLogger(ROOT_LOGGER)
+        if _queue_handler is None:
+            _queue_handler = DroppingQueueHandler(queue_size)
+            _output = LogOutput(sys.stdout)
+            _output.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+            root.addHandler(_queue_handler)
+            root.setLevel(DEFAULT_LEVEL)
+            root.propagate = False
+            _start_writer()
+            atexit.register(shutdown)
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=_restart_in_child)
+        if level is not None:
+            root.setLevel(level.upper() if isinstance(level, str) else level)
+        if path is not None or stream is not None:
+            handler = LogOutput(open(path, "a") if path is not None else stream)
+            handler.setFormatter(_output.formatter)
+            _writer.stop()
+            _output.close()
+            _output = handler
+            _start_writer()
+
+def get_logger(name):
+    """Returns the logger for one module, e.g. get_logger("gameScreen")."""
+    configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+def set_level(level):
+    configure(level=level)
+
+def tracing():
+    return logging.getLogger(ROOT_LOGGER).isEnabledFor(TRACE_LEVEL)
+
+def toggle_trace():
+    """Switches the verbose trace on or off and returns whether it is now on."""
+    set_level(DEFAULT_LEVEL if tracing() else TRACE_LEVEL)
+    return tracing()
+
+def dropped():
+    """Number of records dropped because the writer thread had fallen behind."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+def shutdown():
+    """Writes out every queued record and stops the writer thread."""
+    global _writer
+    with _lock:
+        if _writer is None:
+            return
+        _writer.stop()
+        _writer = None
+        if _queue_handler.dropped:
+            _output.handle(logging.makeLogRecord({
+                "name": ROOT_LOGGER, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": "%d log records dropped", "args": (_queue_handler.dropped,)}))
+        _output.flush()
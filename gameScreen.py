@@ -1,132 +1,267 @@
 import pygame
 import sys
+import heapq
+import math
 import random
 import time
 import socket
 import os
 import pygame.mixer
 
-def init_udp_socket():
+import gameLog
+from textCache import get_font, render_text, text_cache
+from eventRing import format_event
+# Scoring lives in the headless engine; the functions are re-exported here
+# for code that still calls them through gameScreen.
+from gameEngine import (GameEngine, process_transmission, get_codename_from_equipment,
+                        update_individual_scores)
+from udp_receiver import UdpReceiver, ACK_BATCH
+from udp_sender import get_sender
+from arena_ports import CODE_PORT, HIT_PORT
+from frameProfiler import FrameProfiler, PROFILER_HOTKEY
+from stats import LatencyTracker
+
+log = gameLog.get_logger("gameScreen")
+
+# Key that switches the verbose trace (every datagram, ACK and scoring event)
+# on or off during a match.
+TRACE_HOTKEY = pygame.K_F8
+
+# Kernel receive buffer requested for the game socket, so bursts of hits are
+# not dropped while a slow frame is being drawn.
+UDP_RCVBUF = 1024 * 1024
+
+# Address and port the game socket receives hit events on.
+GAME_HOST = "127.0.0.1"
+GAME_PORT = HIT_PORT
+# Where acknowledgements for received messages are sent (the traffic generator).
+ACK_ADDRESS = ("127.0.0.1", CODE_PORT)
+# Port the start/end codes are sent to on the game UDP address.
+GAME_CODE_PORT = CODE_PORT
+
+# Frame rate cap while a match is being played (show_game_screen(fps=...)).
+GAME_FPS = 30
+# Longest a static screen (the entry screen between keystrokes, or the game
+# screen after game over) blocks waiting for input before it checks whether
+# anything else needs redrawing.
+IDLE_TIMEOUT_MS = 1000
+# Window events after which the display has to be repainted.
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+
+def init_udp_socket(rcvbuf=UDP_RCVBUF, host=GAME_HOST, port=GAME_PORT):
     """
-    Initialize and return a non-blocking UDP socket bound to 127.0.0.1 on port 7501.
+    Initialize and return a non-blocking UDP socket bound to host:port
+    (127.0.0.1:7501 by default).
+    rcvbuf sets SO_RCVBUF (the kernel may cap it); pass None to keep the system default.
     """
     udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    udp_socket.bind(("127.0.0.1", 7501))
+    if rcvbuf:
+        udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    udp_socket.bind((host, port))
     udp_socket.setblocking(False)
-    print("UDP socket initialized", flush=True)
+    log.info("UDP socket initialized on %s:%d", host, port)
     return udp_socket
 
-def process_transmission(code, player, green_team, red_team):
+def wait_for_events(timeout_ms):
     """
-    Process a transmission code for scoring (base events only):
-      - Code 53: Green team player scores at Red Base.
-      - Code 43: Red team player scores at Green Base.
-    Updates the player's 'hit_base' status and points.
+    Blocks until an event arrives or timeout_ms passes, then returns every
+    queued event (an empty list on timeout). A timeout of 0 only polls.
     """
-    if code == 53 and player in green_team and not player.get('hit_base', False):
-        player['hit_base'] = True
-        player['points'] = player.get('points', 0) + 100
-        print(f"[CODE 53] {player['codename']} scored on Red Base", flush=True)
-    elif code == 43 and player in red_team and not player.get('hit_base', False):
-        player['hit_base'] = True
-        player['points'] = player.get('points', 0) + 100
-        print(f"[CODE 43] {player['codename']} scored on Green Base", flush=True)
-
-def get_codename_from_equipment(equip, green_team, red_team):
+    events = []
+    if timeout_ms > 0:
+        event = pygame.event.wait(int(timeout_ms))
+        if event.type != pygame.NOEVENT:
+            events.append(event)
+    events.extend(pygame.event.get())
+    return events
+
+TEAM_ROWS = 10
+HEADER_HEIGHT = 40
+SUBHEADER_HEIGHT = 30
+ROW_LEFT_OFFSET = 50
+SCORE_FLASH_COLOR = (255, 215, 0)
+# Teams with more players than TEAM_ROWS are shown a page at a time; the
+# page advances this often.
+LEADERBOARD_PAGE_SECONDS = 5
+PAGE_KEYS = {pygame.K_PAGEUP: -1, pygame.K_PAGEDOWN: 1}
+
+class LeaderboardPager:
     """
-    Returns the codename of the player whose equipment ID matches the provided equip.
-    If not found, returns the equipment ID (as a string).
+    Tracks which page of each team's ranking is on screen. Pages of rows
+    players advance automatically every page_seconds and wrap around; teams
+    that fit on one page are never paged. turn() moves a page by hand and
+    restarts the timer.
     """
-    for player in green_team + red_team:
-        if str(player.get("equipment")) == str(equip):
-            return player.get("codename")
-    return str(equip)
+    def __init__(self, rows=TEAM_ROWS, page_seconds=LEADERBOARD_PAGE_SECONDS, clock=time.monotonic):
+        self.rows = rows
+        self.page_seconds = page_seconds
+        self.clock = clock
+        self._pages = {}
+        self._turned_at = {}
+
+    def page_count(self, size):
+        return max(1, math.ceil(size / self.rows))
+
+    def start(self, team, size):
+        """Returns the index of the first ranked player to show for a team of size players."""
+        now = self.clock()
+        pages = self.page_count(size)
+        page = self._pages.get(team, 0)
+        turned_at = self._turned_at.setdefault(team, now)
+        if pages > 1 and now - turned_at >= self.page_seconds:
+            page += 1
+            self._turned_at[team] = now
+        page %= pages
+        self._pages[team] = page
+        return page * self.rows
+
+    def turn(self, team, step):
+        self._pages[team] = self._pages.get(team, 0) + step
+        self._turned_at[team] = self.clock()
 
-def update_individual_scores(shooter_equip, target_equip, green_team, red_team):
+    def seconds_to_turn(self, team, size):
+        """Seconds until the team's page turns by itself, or None if it has only one page."""
+        if self.page_count(size) == 1:
+            return None
+        turned_at = self._turned_at.get(team, self.clock())
+        return max(0.0, turned_at + self.page_seconds - self.clock())
+
+def page_label(start, rows, size):
+    """Returns e.g. "11-20 of 35" for a paged team, or "" when the team fits on one page."""
+    if size <= rows:
+        return ""
+    return f"{start + 1}-{min(start + rows, size)} of {size}"
+
+def team_section_rects(team_area):
+    """Returns the (header, subheader, body) rectangles of a team section."""
+    header_rect = pygame.Rect(team_area.x, team_area.y, team_area.width, HEADER_HEIGHT)
+    subheader_rect = pygame.Rect(team_area.x, team_area.y + HEADER_HEIGHT, team_area.width, SUBHEADER_HEIGHT)
+    body_rect = pygame.Rect(team_area.x, team_area.y + HEADER_HEIGHT + SUBHEADER_HEIGHT,
+                            team_area.width, team_area.height - HEADER_HEIGHT - SUBHEADER_HEIGHT)
+    return header_rect, subheader_rect, body_rect
+
+def team_row_rect(team_area, index, rows=TEAM_ROWS):
+    """Returns the rectangle holding the rank and player text of the given row (horizontal grid lines excluded)."""
+    body_rect = team_section_rects(team_area)[2]
+    row_height = body_rect.height / rows
+    top = int(body_rect.y + index * row_height) + 1
+    bottom = int(body_rect.y + (index + 1) * row_height)
+    return pygame.Rect(body_rect.x, top, body_rect.width, bottom - top)
+
+def top_players(team_data, count):
+    """Returns the count highest-scoring players, best first, without sorting the whole team."""
+    return heapq.nlargest(count, team_data, key=lambda p: p.get("points", 0))
+
+def team_row_strings(visible_players, rows=TEAM_ROWS):
     """
-    Updates the shooter's score based on a hit event.
-      - Adds 10 points for tagging an opposing player.
-      - Subtracts 10 points for tagging a teammate.
+    Returns the text shown on each scoreboard row ("" for an empty row) for
+    the players on the visible page, best first.
     """
-    shooter = None
-    target = None
-    for player in green_team:
-        if str(player.get("equipment")) == str(shooter_equip):
-            shooter = player
-        if str(player.get("equipment")) == str(target_equip):
-            target = player
-    for player in red_team:
-        if str(player.get("equipment")) == str(shooter_equip):
-            shooter = player
-        if str(player.get("equipment")) == str(target_equip):
-            target = player
-    if shooter and target:
-        shooter_team = "green" if shooter in green_team else "red"
-        target_team = "green" if target in green_team else "red"
-        if shooter_team != target_team:
-            shooter["points"] = shooter.get("points", 0) + 10
-            print(f"{shooter['codename']} (+10) on hitting opposing team {target['codename']}", flush=True)
+    row_strings = []
+    for i in range(rows):
+        if i < len(visible_players):
+            player = visible_players[i]
+            tag = "[B] " if player.get('hit_base') else ""
+            row_strings.append(f"{tag}{player['codename']} - {player.get('points', 0)} pts")
         else:
-            shooter["points"] = shooter.get("points", 0) - 10
-            print(f"{shooter['codename']} (-10) for tagging teammate {target['codename']}", flush=True)
+            row_strings.append("")
+    return row_strings
+
+def score_color(flash_score, text_color):
+    """Returns the current score color; a flashing score toggles to gold twice a second."""
+    if flash_score and int(time.time() * 2) % 2 == 0:
+        return SCORE_FLASH_COLOR
+    return text_color
 
-def draw_team_section(surface, team_area, team_color, team_subheader_color, team_data, font, text_color, flash_score=False):
+def draw_team_chrome(surface, team_area, team_color, team_subheader_color, font, text_color, rows=TEAM_ROWS):
     """
-    Draws a team section (for the left or right side) and displays:
-      - The team name in the header.
-      - The cumulative team score in the subheader (as a score box).
-      - A sorted list of individual players (from highest to lowest score).
-    
-    If flash_score is True, the score flashes (toggling between the normal color and gold).
+    Draws the parts of a team section that never change during a game:
+    the header with the team name, the subheader box, the body and the grid
+    lines. Rank numbers change with the page and are drawn with each row.
     """
-    # Sort team data by points descending.
-    sorted_team = sorted(team_data, key=lambda p: p.get("points", 0), reverse=True)
-    
-    header_height = 40
-    subheader_height = 30
-    header_rect = pygame.Rect(team_area.x, team_area.y, team_area.width, header_height)
-    subheader_rect = pygame.Rect(team_area.x, team_area.y + header_height, team_area.width, subheader_height)
+    header_rect, subheader_rect, body_rect = team_section_rects(team_area)
     
     pygame.draw.rect(surface, team_color, header_rect)
     pygame.draw.rect(surface, team_subheader_color, subheader_rect)
     
     team_name = "Green Team" if team_color == (0, 128, 0) else "Red Team"
-    header_text = font.render(team_name, True, text_color)
+    header_text = render_text(font, team_name, text_color)
     surface.blit(header_text, header_text.get_rect(center=(header_rect.centerx, header_rect.centery - 4)))
     
-    cumulative_score = sum([p.get("points", 0) for p in team_data])
-    if flash_score:
-        flash_color = (255, 215, 0) if int(time.time() * 2) % 2 == 0 else text_color
-        score_text = font.render(f"Score: {cumulative_score}", True, flash_color)
-    else:
-        score_text = font.render(f"Score: {cumulative_score}", True, text_color)
-    surface.blit(score_text, score_text.get_rect(center=(subheader_rect.centerx, subheader_rect.centery)))
-    
-    body_rect = pygame.Rect(team_area.x, team_area.y + header_height + subheader_height, 
-                            team_area.width, team_area.height - header_height - subheader_height)
     body_color = (0, 70, 0) if team_color == (0, 128, 0) else (100, 0, 0)
     pygame.draw.rect(surface, body_color, body_rect)
     
-    rows = 10
     row_height = body_rect.height / rows
     grid_color = pygame.Color('grey50')
     for i in range(rows + 1):
         y = body_rect.y + i * row_height
         pygame.draw.line(surface, grid_color, (body_rect.x, y), (body_rect.x + body_rect.width, y), 1)
-    left_offset = 50
-    pygame.draw.line(surface, grid_color, (body_rect.x + left_offset, body_rect.y), 
-                     (body_rect.x + left_offset, body_rect.y + body_rect.height), 1)
+    pygame.draw.line(surface, grid_color, (body_rect.x + ROW_LEFT_OFFSET, body_rect.y), 
+                     (body_rect.x + ROW_LEFT_OFFSET, body_rect.y + body_rect.height), 1)
+
+def draw_team_score(surface, team_area, font, color, cumulative_score, page=""):
+    """
+    Draws the cumulative team score centered in the subheader, and the
+    page label (see page_label()) at its right end when the team is paged.
+    Returns the subheader rect.
+    """
+    subheader_rect = team_section_rects(team_area)[1]
+    score_text = render_text(font, f"Score: {cumulative_score}", color)
+    surface.blit(score_text, score_text.get_rect(center=(subheader_rect.centerx, subheader_rect.centery)))
+    if page:
+        page_text = render_text(get_font(20), page, color)
+        surface.blit(page_text, page_text.get_rect(midright=(subheader_rect.right - 6, subheader_rect.centery)))
+    return subheader_rect
+
+def draw_team_row(surface, team_area, index, player_str, font, text_color, rows=TEAM_ROWS, rank=None):
+    """
+    Draws the rank number (index + 1 unless rank is given) and one player's
+    text in the given scoreboard row. Returns the row rect.
+    """
+    row_rect = team_row_rect(team_area, index, rows)
+    body_rect = team_section_rects(team_area)[2]
+    row_height = body_rect.height / rows
+    y = body_rect.y + index * row_height
+    number_text = render_text(font, f"{rank or index + 1}", text_color)
+    surface.blit(number_text, number_text.get_rect(center=(body_rect.x + ROW_LEFT_OFFSET // 2, y + row_height / 2)))
+    if player_str:
+        player_text = render_text(font, player_str, text_color)
+        surface.blit(player_text, (body_rect.x + ROW_LEFT_OFFSET + 10, y + row_height/2 - player_text.get_height()/2))
+    return row_rect
+
+def draw_team_section(surface, team_area, team_color, team_subheader_color, team_data, font, text_color, flash_score=False,
+                      sorted_team=None, cumulative_score=None, start=0, rows=TEAM_ROWS):
+    """
+    Draws a team section (for the left or right side) and displays:
+      - The team name in the header.
+      - The cumulative team score in the subheader (as a score box).
+      - One page of individual players (from highest to lowest score),
+        ranked start + 1 to start + rows.
     
-    for i in range(rows):
-        y = body_rect.y + i * row_height
-        number_text = font.render(f"{i+1}", True, text_color)
-        surface.blit(number_text, (body_rect.x + 10, y + row_height/2 - number_text.get_height()/2))
-        if i < len(sorted_team):
-            player = sorted_team[i]
-            tag = "[B] " if player.get('hit_base') else ""
-            player_str = f"{tag}{player['codename']} - {player.get('points', 0)} pts"
-            player_text = font.render(player_str, True, text_color)
-            surface.blit(player_text, (body_rect.x + left_offset + 10, y + row_height/2 - player_text.get_height()/2))
+    If flash_score is True, the score flashes (toggling between the normal color and gold).
+    sorted_team and cumulative_score may be passed in from a Scoreboard to skip
+    ranking and summing team_data here; otherwise only the top start + rows
+    players are selected rather than sorting the whole team.
+    """
+    if sorted_team is None:
+        visible = top_players(team_data, start + rows)[start:]
+    else:
+        visible = sorted_team[start:start + rows]
+    if cumulative_score is None:
+        cumulative_score = sum([p.get("points", 0) for p in team_data])
+    
+    draw_team_chrome(surface, team_area, team_color, team_subheader_color, font, text_color, rows)
+    draw_team_score(surface, team_area, font, score_color(flash_score, text_color), cumulative_score,
+                    page_label(start, rows, len(team_data)))
+    for i, player_str in enumerate(team_row_strings(visible, rows)):
+        draw_team_row(surface, team_area, i, player_str, font, text_color, rows, start + i + 1)
+
+def timer_rect(timer_font, screen_width, screen_height):
+    """Returns the fixed area the countdown timer is drawn in."""
+    width, height = timer_font.size("00:00")
+    rect = pygame.Rect(0, 0, width + 20, height + 4)
+    rect.center = (screen_width // 2, screen_height - 40)
+    return rect
 
 def draw_timer(surface, timer_font, time_left, screen_width, screen_height):
     """
@@ -135,35 +270,103 @@ def draw_timer(surface, timer_font, time_left, screen_width, screen_height):
     minutes = time_left // 60
     seconds = time_left % 60
     timer_str = f"{minutes:02}:{seconds:02}"
-    timer_text = timer_font.render(timer_str, True, (255, 255, 255))
+    timer_text = render_text(timer_font, timer_str, (255, 255, 255))
     text_rect = timer_text.get_rect(center=(screen_width // 2, screen_height - 40))
     surface.blit(timer_text, text_rect)
 
-def draw_play_by_play(surface, events, rect):
+PLAY_BY_PLAY_MARGIN_TOP = 30
+PLAY_BY_PLAY_MARGIN_BOTTOM = 80
+PLAY_BY_PLAY_LINE_SPACING = 8
+
+PLAY_BY_PLAY_BG = (20, 20, 20)
+
+def play_by_play_text_rect(rect, line_height):
+    """Returns the area of the play-by-play panel that event lines are drawn in."""
+    available_height = rect.height - PLAY_BY_PLAY_MARGIN_TOP - PLAY_BY_PLAY_MARGIN_BOTTOM
+    max_lines = available_height // line_height
+    return pygame.Rect(rect.x + 2, rect.y + PLAY_BY_PLAY_MARGIN_TOP, rect.width - 4, max_lines * line_height)
+
+def draw_play_by_play_frame(surface, rect):
+    """Draws the background and border of the play-by-play panel."""
+    pygame.draw.rect(surface, PLAY_BY_PLAY_BG, rect)
+    pygame.draw.rect(surface, (255, 255, 255), rect, 2)
+
+class PlayByPlayPanel:
+    """
+    Keeps the visible play-by-play lines in an offscreen surface.
+    On update() the surface is scrolled up by the number of new events and
+    only those lines are rendered, at most one panel's worth per frame, so
+    the drawing cost does not grow with the event rate.
+    New events appear at the bottom.
+    """
+    def __init__(self, rect, events):
+        self.rect = rect
+        self.events = events
+        self.font = get_font(24)
+        self.line_height = self.font.get_height() + PLAY_BY_PLAY_LINE_SPACING
+        self.text_rect = play_by_play_text_rect(rect, self.line_height)
+        self.max_lines = self.text_rect.height // self.line_height
+        self.surface = pygame.Surface(self.text_rect.size)
+        self.surface.fill(PLAY_BY_PLAY_BG)
+        self.lines_shown = 0
+        self.drawn_total = 0
+
+    def update(self):
+        """Renders any events appended since the last call. Returns True if the panel changed."""
+        new_count = self.events.total - self.drawn_total
+        if new_count <= 0:
+            return False
+        new_records = self.events.latest(min(new_count, self.max_lines))
+        overflow = self.lines_shown + len(new_records) - self.max_lines
+        if overflow > 0:
+            self.surface.scroll(0, -overflow * self.line_height)
+            self.lines_shown -= overflow
+            self.surface.fill(PLAY_BY_PLAY_BG, pygame.Rect(0, self.lines_shown * self.line_height,
+                                                          self.text_rect.width, overflow * self.line_height))
+        for record in new_records:
+            line = self.font.render(format_event(record), True, (255, 255, 255))
+            self.surface.blit(line, (3, self.lines_shown * self.line_height))
+            self.lines_shown += 1
+        self.drawn_total = self.events.total
+        return True
+
+    def draw(self, surface):
+        """Blits the panel's lines onto surface. Returns the rect that was drawn."""
+        surface.blit(self.surface, self.text_rect.topleft)
+        return self.text_rect
+
+def draw_play_by_play(surface, panel, rect):
     """
     Draws the play-by-play log within the provided rectangle.
     New events appear at the bottom 
     """
-    pygame.draw.rect(surface, (20, 20, 20), rect)
-    pygame.draw.rect(surface, (255, 255, 255), rect, 2)
-    
-    event_font = pygame.font.Font(None, 24)
-    line_spacing = 8
-    line_height = event_font.get_height() + line_spacing
-    margin_top = 30
-    margin_bottom = 80
-    
-    available_height = rect.height - margin_top - margin_bottom
-    max_lines = available_height // line_height
-    
-    events_to_draw = events[-max_lines:]
-    
-    for idx, event in enumerate(events_to_draw):
-        y = rect.y + margin_top + idx * line_height
-        text_surface = event_font.render(event, True, (255, 255, 255))
-        surface.blit(text_surface, (rect.x + 5, y))
+    draw_play_by_play_frame(surface, rect)
+    panel.update()
+    panel.draw(surface)
 
-def show_game_screen(screen, green_team, red_team, udp_address, udp_socket):
+def build_static_layer(size, left_section, right_section, center_section, font, text_color):
+    """
+    Pre-renders everything on the game screen that does not change during a
+    game (team headers, grids, row numbers and the empty play-by-play panel)
+    into an offscreen surface. Dynamic regions are restored from this layer
+    before they are redrawn.
+    """
+    layer = pygame.Surface(size)
+    layer.fill((0, 0, 0))
+    draw_team_chrome(layer, left_section, (0, 128, 0), (0, 100, 0), font, text_color)
+    draw_team_chrome(layer, right_section, (200, 0, 0), (150, 0, 0), font, text_color)
+    draw_play_by_play_frame(layer, center_section)
+    return layer
+
+def log_latency_summary(latency):
+    log.info("Hit latency:")
+    for line in latency.report_lines():
+        log.info("  %s", line)
+
+def show_game_screen(screen, green_team, red_team, udp_address, udp_socket, roster_index=None, dirty_rects=True,
+                     ack_address=ACK_ADDRESS, ack_mode=ACK_BATCH, sender=None, event_log=None,
+                     journal=None, profiler=None, latency=None, engine=None, code_port=GAME_CODE_PORT,
+                     fps=GAME_FPS):
     """
     Displays the game screen with:
       - Left: Green team area (showing cumulative team score and individual scores).
@@ -171,11 +374,52 @@ def show_game_screen(screen, green_team, red_team, udp_address, udp_socket):
       - Center: A play-by-play log for game events.
       - Bottom: A countdown timer.
     
-    Processes UDP messages via the provided non-blocking socket.
+    Processes UDP messages via the provided non-blocking socket, which is read
+    by a background UdpReceiver thread. Messages are acknowledged to
+    ack_address, either one "ACK" per message (ACK_PER_MESSAGE) or one
+    sequence-numbered "ACK:<seqs>" datagram per socket drain for binary
+    messages (ACK_BATCH; text messages always get a plain "ACK").
+    The end code is sent to udp_address:code_port through sender (the shared
+    UdpSender by default).
+    If an event_log (database.GameEventLog) is given, every scoring event is
+    queued on it and the final team scores are recorded when the game ends.
+    If a journal (matchJournal.MatchJournal) is given, the teams and every
+    received datagram are written to it so the match can be replayed later.
     UDP messages containing a colon are interpreted as hit events.
     For each hit event, the shooter's individual score is updated:
       - +10 points for tagging an opposing player.
       - -10 points for tagging a teammate.
+    Hits are resolved through roster_index (see roster.build_roster_index);
+    if none is supplied, one is built from the two teams at game start.
+
+    With dirty_rects enabled, the static parts of the screen are rendered once
+    into an offscreen layer and each frame only the rows, scores, timer and
+    play-by-play lines that changed are repainted and pushed with
+    pygame.display.update(rects). Otherwise the whole window is redrawn and
+    flipped, but only in frames where the timer, play-by-play, scores, pages
+    or window changed.
+
+    While the match is running the loop is capped at fps frames per second.
+    After game over the screen is static, so it blocks waiting for input
+    instead of redrawing.
+
+    Each team section shows TEAM_ROWS players. Larger teams are paged
+    (see LeaderboardPager): the page advances every LEADERBOARD_PAGE_SECONDS
+    or with Page Up / Page Down, and only the visible page is drawn.
+
+    Each frame's phases (events, UDP drain, scoring, team sections,
+    play-by-play, timer, display update and the wait for the next frame) are
+    timed by profiler (a frameProfiler.FrameProfiler, created if not given).
+    F9 toggles its overlay; while it is shown the dirty-rect path repaints
+    the whole window every frame.
+
+    Hit latency is measured from each datagram's arrival on the socket until
+    the hit was taken off the receiver queue, scored, and shown on screen,
+    in latency (a stats.LatencyTracker, created if not given). A summary is
+    logged when the match ends.
+
+    Messages go through gameLog and are written by its background thread.
+    F8 switches on the verbose trace of every datagram, ACK and scoring event.
     """
     WIDTH, HEIGHT = screen.get_width(), screen.get_height()
     pygame.display.set_caption("Team Interface")
@@ -185,10 +429,12 @@ def show_game_screen(screen, green_team, red_team, udp_address, udp_socket):
     BLACK = (0, 0, 0)
     WHITE = (255, 255, 255)
     
-    font = pygame.font.Font(None, 36)
-    timer_font = pygame.font.Font(None, 60)
+    font = get_font(36)
+    timer_font = get_font(60)
+    over_font = get_font(72)
+    overlay = None
     
-    print("Game screen started", flush=True)
+    log.info("Game screen started")
 
     # --- Audio Setup ---
     pygame.mixer.init()
@@ -200,111 +446,220 @@ def show_game_screen(screen, green_team, red_team, udp_address, udp_socket):
         pygame.mixer.music.load(track_path)
         pygame.mixer.music.set_volume(1.0)  # 1.0 = 100%
         pygame.mixer.music.play()
-        print(f"Now playing: {track_filename}", flush=True)
+        log.info("Now playing: %s", track_filename)
     except Exception as e:
-        print(f"Error loading or playing audio: {e}", flush=True)
+        log.error("Error loading or playing audio: %s", e)
 
     
-    play_by_play_events = []
+    # The engine owns scoring, the roster index and the play-by-play history;
+    # this screen feeds it hits and draws its state.
+    # A game session (see gameSession.py) passes in the engine it owns.
+    if engine is None:
+        engine = GameEngine(green_team, red_team, roster_index=roster_index, event_log=event_log, journal=journal)
+    scoreboard = engine.scoreboard
+    play_by_play_events = engine.events
     
     left_section = pygame.Rect(0, 0, WIDTH // 3, HEIGHT)
     center_section = pygame.Rect(WIDTH // 3, 0, WIDTH // 3, HEIGHT)
     right_section = pygame.Rect(WIDTH * 2 // 3, 0, WIDTH // 3, HEIGHT)
+    team_sections = (("green", left_section), ("red", right_section))
+    
+    # Dirty-rect state: what is currently on screen for each dynamic region.
+    static_layer = None
+    if dirty_rects:
+        static_layer = build_static_layer((WIDTH, HEIGHT), left_section, right_section, center_section, font, WHITE)
+    play_by_play_panel = PlayByPlayPanel(center_section, play_by_play_events)
+    clock_rect = timer_rect(timer_font, WIDTH, HEIGHT)
+    drawn_rows = {"green": None, "red": None}
+    drawn_scores = {"green": None, "red": None}
+    drawn_time_left = None
+    drawn_snapshot = None
+    needs_full_redraw = True
+    pager = LeaderboardPager()
+    if profiler is None:
+        profiler = FrameProfiler("game")
+    if latency is None:
+        latency = LatencyTracker()
+    latency_reported = False
     
-    duration = 6 * 60  # 6-minute game
-    start_time = time.time()
+    engine.start()
+    if journal is not None:
+        journal.write_roster(green_team, red_team)
     clock = pygame.time.Clock()
     running = True
     
     game_over = False
     
+    # Datagrams are read, acknowledged and parsed on a background thread so
+    # ingest does not wait for the frame to finish drawing.
+    receiver = UdpReceiver(udp_socket, ack_address=ack_address, ack_mode=ack_mode, journal=journal)
+    receiver.start()
+    
     while running:
+        # Once the match is over nothing moves unless the profiler overlay
+        # is up, so wait for input rather than polling at fps.
+        idle = game_over and not profiler.visible
+        events = wait_for_events(IDLE_TIMEOUT_MS if idle else 0)
+        profiler.begin_frame()
         
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type in EXPOSE_EVENTS:
+                needs_full_redraw = True
             # While the game is running, allow ESC to quit.
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
+                elif event.key == PROFILER_HOTKEY:
+                    profiler.toggle()
+                    needs_full_redraw = True
+                elif event.key == TRACE_HOTKEY:
+                    log.info("Verbose trace %s", "on" if gameLog.toggle_trace() else "off")
+                elif event.key in PAGE_KEYS:
+                    for team, _ in team_sections:
+                        pager.turn(team, PAGE_KEYS[event.key])
+        profiler.mark("events")
         
-        # Process all incoming UDP messages.
-        while True:
-            try:
-                data, addr = udp_socket.recvfrom(1024)
-                incoming = data.decode('utf-8')
-                print("Received from traffic generator: " + incoming, flush=True)
-                udp_socket.sendto("ACK".encode('utf-8'), ("127.0.0.1", 7500))
-                print("Sent ACK for message: " + incoming, flush=True)
-                if ":" in incoming:
-                    parts = incoming.split(":")
-                    if len(parts) == 2:
-                        shooter_equip = parts[0].strip()
-                        target_equip = parts[1].strip()
-                        shooter_name = get_codename_from_equipment(shooter_equip, green_team, red_team)
-                        target_name = get_codename_from_equipment(target_equip, green_team, red_team)
-                        event_msg = f"{shooter_name} hit {target_name}"
-                        play_by_play_events.append(event_msg)
-                        if len(play_by_play_events) > 50:
-                            play_by_play_events.pop(0)
-                        print("Added event: " + event_msg, flush=True)
-                        update_individual_scores(shooter_equip, target_equip, green_team, red_team)
-            except BlockingIOError:
-                break
-            except Exception as e:
-                print("UDP recv error:", e, flush=True)
-                break
+        # Process every hit the receiver thread has queued since the last frame.
+        hits = receiver.drain()
+        profiler.mark("drain")
+        if game_over:
+            for hit in hits:
+                engine.apply(hit)
+        else:
+            latency.drained([hit.arrival for hit in hits], time.monotonic())
+            for hit in hits:
+                engine.apply(hit)
+                latency.scored(hit.arrival, time.monotonic())
+        profiler.mark("scoring")
         
-        elapsed = time.time() - start_time
-        time_left = max(0, duration - int(elapsed))
+        time_left = engine.time_left()
         
-        screen.fill(BLACK)
-        draw_team_section(screen, left_section, GREEN, (0, 100, 0), green_team, font, WHITE,
-                          flash_score=(sum(p.get("points", 0) for p in green_team) > sum(p.get("points", 0) for p in red_team)))
-        draw_team_section(screen, right_section, RED, (150, 0, 0), red_team, font, WHITE,
-                          flash_score=(sum(p.get("points", 0) for p in red_team) > sum(p.get("points", 0) for p in green_team)))
-        draw_play_by_play(screen, play_by_play_events, center_section)
-        draw_timer(screen, timer_font, time_left, WIDTH, HEIGHT)
+        leader = scoreboard.leader()
+        # Only the visible page of each ranking is drawn.
+        page_starts = {team: pager.start(team, scoreboard.size(team)) for team, _ in team_sections}
+        dirty = []
+        if dirty_rects and not game_over:
+            # The profiling overlay is drawn over the other regions, so they
+            # are all repainted while it is shown.
+            full_redraw = needs_full_redraw or profiler.visible
+            if full_redraw:
+                screen.blit(static_layer, (0, 0))
+                dirty.append(screen.get_rect())
+                drawn_rows = {"green": None, "red": None}
+                drawn_scores = {"green": None, "red": None}
+                drawn_time_left = None
+                needs_full_redraw = False
+            for team, section in team_sections:
+                start = page_starts[team]
+                rows = (start, team_row_strings(scoreboard.window(team, start, TEAM_ROWS)))
+                previous_rows = drawn_rows[team]
+                for i, row_str in enumerate(rows[1]):
+                    if previous_rows is None or previous_rows[0] != start or previous_rows[1][i] != row_str:
+                        row_rect = team_row_rect(section, i)
+                        screen.blit(static_layer, row_rect, row_rect)
+                        dirty.append(draw_team_row(screen, section, i, row_str, font, WHITE, rank=start + i + 1))
+                drawn_rows[team] = rows
+                score_state = (scoreboard.total(team), score_color(leader == team, WHITE),
+                               page_label(start, TEAM_ROWS, scoreboard.size(team)))
+                if drawn_scores[team] != score_state:
+                    score_rect = team_section_rects(section)[1]
+                    screen.blit(static_layer, score_rect, score_rect)
+                    dirty.append(draw_team_score(screen, section, font, score_state[1], score_state[0], score_state[2]))
+                    drawn_scores[team] = score_state
+            profiler.mark("teams")
+            if play_by_play_panel.update() or full_redraw:
+                dirty.append(play_by_play_panel.draw(screen))
+            profiler.mark("play_by_play")
+            if drawn_time_left != time_left:
+                screen.blit(static_layer, clock_rect, clock_rect)
+                draw_timer(screen, timer_font, time_left, WIDTH, HEIGHT)
+                dirty.append(clock_rect)
+                drawn_time_left = time_left
+            profiler.mark("timer")
+        elif not dirty_rects:
+            # Everything on screen follows from this; the leader's score
+            # flashes, so its color is part of it.
+            snapshot = (time_left, play_by_play_events.total, tuple(page_starts.values()),
+                        score_color(leader == "green", WHITE), score_color(leader == "red", WHITE))
+            if needs_full_redraw or profiler.visible or snapshot != drawn_snapshot:
+                drawn_snapshot = snapshot
+                needs_full_redraw = False
+                screen.fill(BLACK)
+                draw_team_section(screen, left_section, GREEN, (0, 100, 0), green_team, font, WHITE,
+                                  flash_score=(leader == "green"), sorted_team=scoreboard.ranking("green"),
+                                  cumulative_score=scoreboard.total("green"), start=page_starts["green"])
+                draw_team_section(screen, right_section, RED, (150, 0, 0), red_team, font, WHITE,
+                                  flash_score=(leader == "red"), sorted_team=scoreboard.ranking("red"),
+                                  cumulative_score=scoreboard.total("red"), start=page_starts["red"])
+                profiler.mark("teams")
+                draw_play_by_play(screen, play_by_play_panel, center_section)
+                profiler.mark("play_by_play")
+                draw_timer(screen, timer_font, time_left, WIDTH, HEIGHT)
+                dirty.append(screen.get_rect())
+                profiler.mark("timer")
         
         # Optionally simulate base hit events (for testing):
         if pygame.time.get_ticks() % 1000 < 30:
-            all_players = green_team + red_team
-            if all_players:
-                player = random.choice(all_players)
-                code = 53 if player in green_team else 43
-                process_transmission(code, player, green_team, red_team)
-                event_msg = f"{player['codename']} triggered a base hit"
-                play_by_play_events.append(event_msg)
-                if len(play_by_play_events) > 50:
-                    play_by_play_events.pop(0)
+            engine.simulate_base_hit()
         
         # When the timer expires and game over has not been set, send code 221 and enter game over state.
         if time_left <= 0 and not game_over:
-            from main import send_udp_message
-            send_udp_message(udp_address, 221)
+            if sender is None:
+                sender = get_sender()
+            sender.send(udp_address, 221, code_port)
+            log.info("Sent message '221' to %s:%d", udp_address, code_port)
+            engine.finish()
+            log_latency_summary(latency)
+            latency_reported = True
             game_over = True
+            # The overlay covers the whole window, so push it in full once.
+            dirty = [screen.get_rect()]
             pygame.mixer.music.stop()
-            print("Game Over. Displaying overlay indefinitely.", flush=True)
-
-       
-
+            log.info("Game Over. Displaying overlay indefinitely.")
         
         # If in game over state, draw an overlay.
-        if game_over:
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))
+        if game_over and dirty:
+            if overlay is None:
+                overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+                overlay.fill((0, 0, 0, 180))
             screen.blit(overlay, (0, 0))
-            over_font = pygame.font.Font(None, 72)
-            over_text = over_font.render("GAME OVER", True, (255, 0, 0))
+            over_text = render_text(over_font, "GAME OVER", (255, 0, 0))
             screen.blit(over_text, over_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 50)))
-            info_font = pygame.font.Font(None, 36)
-            info_text = info_font.render("Press ESC to exit", True, (255, 255, 255))
+            info_text = render_text(font, "Press ESC to exit", (255, 255, 255))
             screen.blit(info_text, info_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 10)))
+        elif game_over and dirty_rects and needs_full_redraw:
+            # The window was uncovered; push what is already on screen again.
+            dirty.append(screen.get_rect())
+            needs_full_redraw = False
+        
+        overlay_rect = profiler.draw_overlay(screen)
+        if overlay_rect is not None and game_over:
+            dirty.append(overlay_rect)
+        profiler.mark("overlay")
         
-        pygame.display.flip()
-        clock.tick(30)
+        if dirty:
+            if dirty_rects:
+                pygame.display.update(dirty)
+            else:
+                pygame.display.flip()
+        latency.displayed(time.monotonic())
+        profiler.mark("display")
+        clock.tick(fps)
+        profiler.mark("wait")
+        profiler.end_frame()
     
     # Clean up when the window is closed.
+    engine.finish()
+    if not latency_reported:
+        log_latency_summary(latency)
+    receiver.stop()
     udp_socket.close()
-    print("Exiting game screen.", flush=True)
+    log.info("UDP receiver: %d received, %d dropped, %d ACK datagrams sent",
+             receiver.received, receiver.dropped, receiver.acks_sent)
+    log.info("Text cache: %s", text_cache.stats())
+    if gameLog.dropped():
+        log.warning("%d log records dropped so far", gameLog.dropped())
+    log.info("Exiting game screen.")
     return
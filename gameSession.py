@@ -0,0 +1,224 @@
+import argparse
+import threading
+import time
+
+import database
+import gameLog
+import gameScreen
+import matchJournal
+from arena_ports import arena_ports
+from gameEngine import GameEngine, GAME_DURATION, make_teams
+from roster import build_roster_index
+from stats import LatencyTracker
+from udp_receiver import UdpReceiver, ACK_BATCH
+from udp_sender import get_sender
+
+log = gameLog.get_logger("gameSession")
+
+START_CODE = 202
+END_CODE = 221
+
+class GameSession:
+    """
+    One arena's match: its roster, game socket and port pair, and the
+    GameEngine holding its scores and clock.
+
+    Hits are received on host:game_port. ACKs go to ack_host:code_port and
+    the start and end codes to udp_address:code_port, so each arena's
+    traffic generator listens on its own code_port (7500 for the default
+    arena). Sessions in one process share the UDP sender, the database
+    connection pool (through their event_log) and the font and text caches.
+
+    A session runs either headless on its own thread (start()/join()) or
+    on a pygame display in the calling thread (run_on_screen()); only one
+    session per process can have the display.
+    """
+    def __init__(self, name, green_team, red_team, game_port=gameScreen.GAME_PORT, code_port=gameScreen.GAME_CODE_PORT,
+                 host=gameScreen.GAME_HOST, udp_address="127.0.0.1", ack_host="127.0.0.1", roster_index=None,
+                 duration=GAME_DURATION, clock=time.monotonic, event_log=None, journal=None, ack_mode=ACK_BATCH):
+        self.name = name
+        self.green_team = green_team
+        self.red_team = red_team
+        self.game_port = game_port
+        self.code_port = code_port
+        self.host = host
+        self.udp_address = udp_address
+        self.ack_address = (ack_host, code_port)
+        self.ack_mode = ack_mode
+        self.roster_index = roster_index if roster_index is not None else build_roster_index(green_team, red_team)
+        self.event_log = event_log
+        self.journal = journal
+        self.engine = GameEngine(green_team, red_team, roster_index=self.roster_index, clock=clock,
+                                 duration=duration, event_log=event_log, journal=journal)
+        # Headless matches draw nothing; run_on_screen() tracks the display stage too.
+        self.latency = LatencyTracker(displayed=False)
+        self.udp_socket = None
+        self.receiver = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def open(self):
+        """Binds the session's game socket."""
+        if self.udp_socket is None:
+            self.udp_socket = gameScreen.init_udp_socket(host=self.host, port=self.game_port)
+        return self.udp_socket
+
+    def send_start(self):
+        """Arms every vest in the roster and sends the start code in one burst."""
+        equipment_ids = [p["equipment"] for p in self.green_team + self.red_team]
+        sent = get_sender().send_batch(self.udp_address, equipment_ids + [START_CODE], self.code_port)
+        log.info("[%s] Sent %d start messages to %s:%d", self.name, sent, self.udp_address, self.code_port)
+
+    def run_on_screen(self, screen, **kwargs):
+        """Plays the match on the game screen in this thread; extra arguments go to show_game_screen."""
+        self.latency = LatencyTracker()
+        gameScreen.show_game_screen(screen, self.green_team, self.red_team, self.udp_address, self.open(),
+                                    self.roster_index, ack_address=self.ack_address, ack_mode=self.ack_mode,
+                                    event_log=self.event_log, journal=self.journal, latency=self.latency,
+                                    engine=self.engine, code_port=self.code_port, **kwargs)
+        self.udp_socket = None
+
+    def run_headless(self, poll_interval=0.02):
+        """
+        Plays the match without a display: hits are scored as they are
+        drained from the receiver until the clock runs out or stop() is called.
+        """
+        udp_socket = self.open()
+        self.engine.start()
+        if self.journal is not None:
+            self.journal.write_roster(self.green_team, self.red_team)
+        self.receiver = UdpReceiver(udp_socket, ack_address=self.ack_address, ack_mode=self.ack_mode,
+                                    journal=self.journal)
+        self.receiver.start()
+        try:
+            while not self._stop_event.wait(poll_interval):
+                hits = self.receiver.drain()
+                self.latency.drained([hit.arrival for hit in hits], time.monotonic())
+                for hit in hits:
+                    self.engine.apply(hit)
+                    self.latency.scored(hit.arrival, time.monotonic())
+                if self.engine.is_over():
+                    get_sender().send(self.udp_address, END_CODE, self.code_port)
+                    break
+        finally:
+            self.engine.finish()
+            self.receiver.stop()
+            udp_socket.close()
+            self.udp_socket = None
+            self.report()
+
+    def report(self):
+        """Logs the final score, hit counts and latency of a headless match."""
+        scoreboard = self.engine.scoreboard
+        log.info("[%s] Final score: green %d, red %d (%d hits, %d received, %d dropped)",
+                 self.name, scoreboard.total("green"), scoreboard.total("red"),
+                 self.engine.hits_processed, self.receiver.received, self.receiver.dropped)
+        for line in self.latency.report_lines():
+            if not line.endswith("no samples"):
+                log.info("[%s]   %s", self.name, line)
+
+    def start(self):
+        """Runs the match headless on a background thread."""
+        self._thread = threading.Thread(target=self.run_headless, name=f"session-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+def teams_from_roster(roster):
+    """Splits a database.read_roster_file() roster into green and red player lists."""
+    teams = {"green": [], "red": []}
+    for entry in roster:
+        if entry["equipment"] is None or entry["team"] is None:
+            continue
+        teams[entry["team"]].append({"player_id": str(entry["id"]), "codename": entry["codename"],
+                                     "equipment": str(entry["equipment"])})
+    return teams["green"], teams["red"]
+
+def run_sessions(sessions, screen=None):
+    """
+    Runs several sessions at once: all headless, or the first one on screen
+    in this thread and the rest headless. Returns once every match is over.
+    """
+    headless = sessions[1:] if screen is not None else sessions
+    for session in headless:
+        session.start()
+    try:
+        if screen is not None:
+            sessions[0].run_on_screen(screen)
+        for session in headless:
+            # Joined with a timeout so Ctrl+C still interrupts the wait.
+            while session.is_running():
+                session.join(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for session in headless:
+            session.stop()
+        for session in headless:
+            session.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several arenas' games from one process.")
+    parser.add_argument("--arenas", type=int, default=3, help="number of concurrent game sessions (default 3)")
+    parser.add_argument("--base-port", type=int, default=gameScreen.GAME_CODE_PORT,
+                        help="code/ACK port of arena 0; arena i uses base+2i for codes and ACKs and base+2i+1 for hits")
+    parser.add_argument("--udp-address", default="127.0.0.1", help="address the start and end codes are sent to")
+    parser.add_argument("--roster", action="append", default=[],
+                        help="roster file for the next arena (repeat once per arena); other arenas get synthetic teams")
+    parser.add_argument("--players", type=int, default=2, help="players per team in synthetic rosters (default 2)")
+    parser.add_argument("--duration", type=float, default=GAME_DURATION, help="match length in seconds (default 360)")
+    parser.add_argument("--display", action="store_true", help="show arena 0 on the game screen")
+    parser.add_argument("--log-events", action="store_true", help="record every match in the database")
+    parser.add_argument("--journal-dir", help="write a match journal per arena to this directory")
+    parser.add_argument("--no-start", action="store_true", help="do not send the vest and 202 start codes")
+    parser.add_argument("--log-level", default="INFO", help="logging level; DEBUG traces every hit (default INFO)")
+    args = parser.parse_args()
+    gameLog.set_level(args.log_level)
+
+    sessions = []
+    for i in range(args.arenas):
+        if i < len(args.roster):
+            green, red = teams_from_roster(database.read_roster_file(args.roster[i]))
+        else:
+            green, red = make_teams(args.players)
+        code_port, game_port = arena_ports(i, args.base_port)
+        event_log = None
+        if args.log_events:
+            event_log = database.GameEventLog()
+            event_log.start()
+        journal = None
+        if args.journal_dir:
+            journal = matchJournal.open_match_journal(args.journal_dir, suffix=f"-arena{i}")
+        sessions.append(GameSession(f"arena{i}", green, red, game_port=game_port, code_port=code_port,
+                                    udp_address=args.udp_address, duration=args.duration,
+                                    event_log=event_log, journal=journal))
+        log.info("arena%d: hits on port %d, codes and ACKs on port %d, %d green / %d red players",
+                 i, game_port, code_port, len(green), len(red))
+
+    screen = None
+    if args.display:
+        import pygame
+        pygame.init()
+        screen = pygame.display.set_mode((1024, 768))
+    for session in sessions:
+        session.open()
+        if not args.no_start:
+            session.send_start()
+    run_sessions(sessions, screen)
+    for session in sessions:
+        if session.event_log is not None:
+            session.event_log.wait()
+        if session.journal is not None:
+            session.journal.close()
+            log.info("[%s] Match journal written to %s", session.name, session.journal.path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import struct
+import time
+
+# Compact binary hit event, an alternative to the "shooter:target" text format.
+# Layout (network byte order, 20 bytes):
+#   magic     B  HIT_MAGIC, never a printable character, so text and binary
+#                datagrams can share the socket and be told apart per datagram
+#   version   B  HIT_VERSION
+#   shooter   H  shooter equipment ID
+#   target    H  target equipment ID (0 for base events)
+#   code      H  CODE_HIT for a player hit, or the base code (43 / 53)
+#   seq       I  sender sequence number, echoed back in batched ACKs
+#   sent_us   Q  sender wall-clock timestamp in microseconds
+HIT_MAGIC = 0xB7
+HIT_VERSION = 1
+HIT_STRUCT = struct.Struct("!BBHHHIQ")
+HIT_SIZE = HIT_STRUCT.size
+
+CODE_HIT = 0
+BASE_CODES = (43, 53)
+
+def encode_hit(shooter, target, seq, sent_us=None):
+    """
+    Packs a hit event. target may be a base code (43 or 53), in which case it
+    is sent as the event code, mirroring the "shooter:43" text message.
+    """
+    if sent_us is None:
+        sent_us = int(time.time() * 1_000_000)
+    shooter = int(shooter)
+    target = int(target)
+    if target in BASE_CODES:
+        return HIT_STRUCT.pack(HIT_MAGIC, HIT_VERSION, shooter, 0, target, seq, sent_us)
+    return HIT_STRUCT.pack(HIT_MAGIC, HIT_VERSION, shooter, target, CODE_HIT, seq, sent_us)
+
+def is_binary_hit(data, nbytes):
+    """Returns True if the first nbytes of data hold a binary hit event."""
+    return nbytes == HIT_SIZE and data[0] == HIT_MAGIC and data[1] == HIT_VERSION
+
+def decode_batch(buffer, count):
+    """
+    Decodes count back-to-back binary hit events from the start of buffer
+    without copying them out first. Yields (shooter, target, code, seq, sent_us)
+    tuples; for base events target is the base code, as in the text format.
+    """
+    for _, _, shooter, target, code, seq, sent_us in HIT_STRUCT.iter_unpack(memoryview(buffer)[:count * HIT_SIZE]):
+        yield shooter, (code if code else target), code, seq, sent_us
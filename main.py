@@ -1,22 +1,29 @@
+import argparse
 import pygame
 import psycopg2
-import socket
 import sys
 import random
 import threading
+import os
+import time
 
-# Import external modules for countdown and game screen.
+# Import external modules for countdown, game screen and database access.
 import gameStartTimer
 import gameScreen
+import gameLog
+import database
+import matchJournal
+from gameSession import GameSession
+from frameProfiler import FrameProfiler, PROFILER_HOTKEY
+from roster import index_player, unindex_player
+from textCache import get_font, render_text
+from udp_sender import get_sender
 
 # ---------------------------------------------------------
 # Configuration and Initialization
 # ---------------------------------------------------------
-# Database connection parameters.
-DB_NAME = "photon"
-DB_USER = "student"
-DB_PASSWORD = "student"
-DB_HOST = "localhost"
+# Database connection parameters live in database.connection_params;
+# connections are borrowed from the pool set up below.
 
 # Default UDP port and IP used for sending messages.
 UDP_PORT = 7500
@@ -24,6 +31,27 @@ DEFAULT_UDP_IP = "127.0.0.1"
 # Global game-wide UDP address. This can be changed at runtime.
 game_udp_address = DEFAULT_UDP_IP
 
+# Command-line options.
+arg_parser = argparse.ArgumentParser(description="Laser tag player entry and game software.")
+arg_parser.add_argument("--roster", help="CSV or JSON roster (id, codename, equipment, team) to load at startup")
+arg_parser.add_argument("--journal-dir", default=matchJournal.DEFAULT_JOURNAL_DIR,
+                        help="directory for match journals (replay with matchJournal.py)")
+arg_parser.add_argument("--no-journal", dest="journal_dir", action="store_const", const="",
+                        help="do not write match journals")
+arg_parser.add_argument("--profile-dir",
+                        help="write per-frame timings of each game and of the entry screen as CSV files here")
+arg_parser.add_argument("--log-level", default="INFO",
+                        help="DEBUG traces every datagram, ACK and scoring event (F8 toggles it while running)")
+arg_parser.add_argument("--log-file", help="write the log to this file instead of stdout")
+arg_parser.add_argument("--fps", type=int, default=gameScreen.GAME_FPS,
+                        help=f"frame rate cap on the game screen during a match (default {gameScreen.GAME_FPS})")
+args = arg_parser.parse_args()
+
+# Messages are written by gameLog's background thread, so logging never
+# stalls the entry screen or the game loop.
+gameLog.configure(level=args.log_level, path=args.log_file)
+log = gameLog.get_logger("main")
+
 # Initialize Pygame and the font system.
 import pygame.mixer
 pygame.mixer.pre_init(44100, -16, 2, 2048)  # Optional but recommended settings
@@ -38,7 +66,7 @@ screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Laser Tag - Player Entry")
 
 # Basic font for rendering text.
-FONT = pygame.font.Font(None, 28)
+FONT = get_font(28)
 
 # Clock for controlling the frame rate.
 CLOCK = pygame.time.Clock()
@@ -65,52 +93,79 @@ try:
     splash_image = pygame.image.load("logo.jpg")
     splash_image = pygame.transform.scale(splash_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
 except Exception as e:
-    print("Error loading splash image:", e)
+    log.error("Error loading splash image: %s", e)
     splash_image = None
 
 # ---------------------------------------------------------
 # Database and UDP Helper Functions
 # ---------------------------------------------------------
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST
-        )
-        return conn
-    except Exception as e:
-        print("Database connection error:", e)
-        return None
-
 def send_udp_message(target_ip, message, port=UDP_PORT):
-    try:
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        if target_ip == "255.255.255.255":
-            client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        client_socket.sendto(str(message).encode(), (target_ip, port))
-        client_socket.close()
-        print(f"Sent message '{message}' to {target_ip}:{port}")
-    except Exception as e:
-        print("UDP send error:", e)
-
-def create_table_if_not_exists(cursor):
-    query = """
-    CREATE TABLE IF NOT EXISTS players (
-        id INT PRIMARY KEY,
-        codename VARCHAR(30)
-    );
-    """
-    cursor.execute(query)
+    if get_sender().send(target_ip, message, port):
+        log.info("Sent message '%s' to %s:%d", message, target_ip, port)
+
+def send_udp_messages(target_ip, messages, port=UDP_PORT):
+    sent = get_sender().send_batch(target_ip, messages, port)
+    log.info("Sent %d of %d messages to %s:%d", sent, len(messages), target_ip, port)
 
 # ---------------------------------------------------------
 # Database Initialization
 # ---------------------------------------------------------
-conn = get_db_connection()
-if conn:
-    cursor = conn.cursor()
-    create_table_if_not_exists(cursor)
-    conn.commit()
-    cursor.close()
-    conn.close()
+# Open the connection pool once (this also creates the players table) on the
+# database worker, so a slow or unreachable server does not hold up the splash
+# screen. If the database is down now, the first lookup will try again.
+def report_pool_startup(future):
+    if future.exception() is not None:
+        log.error("Database connection error: %s", future.exception())
+
+database.get_worker().submit(database.init_pool).add_done_callback(report_pool_startup)
+
+# Codenames are preloaded in the background and served from memory; changes
+# are written back to the database in batches.
+codename_cache = database.CodenameCache()
+codename_cache.start()
+
+# A database call submitted from the popup that has not finished yet:
+# (future, on_done). While it is set the popup shows a pending message and
+# ignores input; on_done(result, error) is applied on the UI thread.
+pending_db_request = None
+
+def submit_db_request(fn, args, on_done):
+    global pending_db_request, popup_info_text
+    popup_info_text = ""
+    pending_db_request = (database.get_worker().submit(fn, *args), on_done)
+
+def poll_db_request():
+    """Applies the result of a finished database request; returns True if there was one."""
+    global pending_db_request
+    if pending_db_request is None or not pending_db_request[0].done():
+        return False
+    future, on_done = pending_db_request
+    pending_db_request = None
+    try:
+        result, error = future.result(), None
+    except psycopg2.Error as e:
+        log.error("Database connection error: %s", e)
+        result, error = None, e
+    on_done(result, error)
+    return True
+
+def lookup_codename(player_id, on_done):
+    """Looks up a codename from the cache, or from the database until the cache has loaded."""
+    if codename_cache.is_loaded():
+        on_done(codename_cache.get(player_id), None)
+    else:
+        submit_db_request(database.get_codename, (player_id,), on_done)
+
+def save_codename(player_id, codename, on_done):
+    """Saves a codename to the cache (written back later), or to the database until the cache has loaded."""
+    if codename_cache.is_loaded():
+        on_done(codename_cache.save(player_id, codename), None)
+        return
+    def saved(save_error, error):
+        if not error and not save_error:
+            codename_cache.remember(player_id, codename)
+        on_done(save_error, error)
+    submit_db_request(database.save_player, (player_id, codename), saved)
 
 # ---------------------------------------------------------
 # UI Helper Classes
@@ -121,7 +176,7 @@ class InputBox:
         self.text = text
         self.text_color = text_color
         self.bg_color = bg_color
-        self.txt_surface = FONT.render(text, True, self.text_color)
+        self.txt_surface = render_text(FONT, text, self.text_color)
         self.active = False
         self.color = COLOR_ACTIVE if self.active else COLOR_INACTIVE
 
@@ -137,7 +192,7 @@ class InputBox:
                 self.text = self.text[:-1]
             else:
                 self.text += event.unicode
-            self.txt_surface = FONT.render(self.text, True, self.text_color)
+            self.txt_surface = render_text(FONT, self.text, self.text_color)
 
     def update(self):
         width = max(200, self.txt_surface.get_width() + 10)
@@ -153,7 +208,7 @@ class Button:
         self.rect = pygame.Rect(x, y, w, h)
         self.text = text
         self.callback = callback
-        self.txt_surface = FONT.render(text, True, TEXT_COLOR)
+        self.txt_surface = render_text(FONT, text, TEXT_COLOR)
         self.focused = False
         self.bg_color = bg_color if bg_color is not None else BUTTON_COLOR
 
@@ -185,6 +240,8 @@ class Button:
 state = "splash"
 splash_start_time = None
 players_table = {"green": [], "red": []}
+# Equipment ID -> (player, team) lookup kept in sync with players_table.
+roster_index = {}
 popup_rect = None
 popup_widgets = []
 popup_focus_index = 0
@@ -222,16 +279,24 @@ def draw_grid_for_column(surface, column_rect, rows=10, left_offset=50, line_col
                      (column_rect.x + left_offset, column_rect.y + column_rect.height), 1)
     return row_height
 
-def draw_team_column_data(surface, column_rect, rows, row_height, left_offset, team_data, font, text_color):
+# Each entry table shows ENTRY_ROWS players; larger teams are paged
+# automatically (and with Page Up / Page Down) like the game screen.
+ENTRY_ROWS = 10
+entry_pager = gameScreen.LeaderboardPager(rows=ENTRY_ROWS)
+PAGE_FONT = get_font(20)
+
+def draw_team_column_data(surface, column_rect, rows, row_height, left_offset, team_data, font, text_color, start=0):
+    """Draws the players numbered start + 1 to start + rows; only that page of team_data is rendered."""
     for i in range(rows):
         y = column_rect.y + i * row_height
-        number_text = font.render(f"{i+1}", True, text_color)
-        surface.blit(number_text, (column_rect.x + 10, y + row_height/2 - number_text.get_height()/2))
-        if i < len(team_data):
-            codename_text = font.render(team_data[i]["codename"], True, text_color)
+        number_text = render_text(font, f"{start + i + 1}", text_color)
+        surface.blit(number_text, number_text.get_rect(center=(column_rect.x + left_offset // 2, y + row_height / 2)))
+        if start + i < len(team_data):
+            codename_text = render_text(font, team_data[start + i]["codename"], text_color)
             surface.blit(codename_text, (column_rect.x + left_offset + 10, y + row_height/2 - codename_text.get_height()/2))
 
-def draw_team_column(surface, area, header_text, subheader_text, header_color, subheader_color, body_color, team_data, font, text_color):
+def draw_team_column(surface, area, header_text, subheader_text, header_color, subheader_color, body_color, team_data, font, text_color,
+                     start=0):
     header_height = 40
     subheader_height = 30
     header_rect = pygame.Rect(area.x, area.y, area.width, header_height)
@@ -239,13 +304,18 @@ def draw_team_column(surface, area, header_text, subheader_text, header_color, s
     body_rect = pygame.Rect(area.x, area.y + header_height + subheader_height, area.width, area.height - header_height - subheader_height)
     pygame.draw.rect(surface, header_color, header_rect, border_radius=5)
     pygame.draw.rect(surface, subheader_color, subheader_rect, border_radius=5)
-    header_surf = font.render(header_text, True, WHITE)
-    subheader_surf = font.render(subheader_text, True, WHITE)
+    header_surf = render_text(font, header_text, WHITE)
+    subheader_surf = render_text(font, subheader_text, WHITE)
     surface.blit(header_surf, (header_rect.centerx - header_surf.get_width() // 2, header_rect.centery - header_surf.get_height() // 2))
     surface.blit(subheader_surf, (subheader_rect.centerx - subheader_surf.get_width() // 2, subheader_rect.y + (subheader_height - subheader_surf.get_height()) // 2))
     pygame.draw.rect(surface, body_color, body_rect)
-    row_height = draw_grid_for_column(surface, body_rect, rows=10, left_offset=50)
-    draw_team_column_data(surface, body_rect, rows=10, row_height=row_height, left_offset=50, team_data=team_data, font=font, text_color=text_color)
+    page = gameScreen.page_label(start, ENTRY_ROWS, len(team_data))
+    if page:
+        page_surf = render_text(PAGE_FONT, page, WHITE)
+        surface.blit(page_surf, page_surf.get_rect(midright=(subheader_rect.right - 8, subheader_rect.centery)))
+    row_height = draw_grid_for_column(surface, body_rect, rows=ENTRY_ROWS, left_offset=50)
+    draw_team_column_data(surface, body_rect, rows=ENTRY_ROWS, row_height=row_height, left_offset=50, team_data=team_data,
+                          font=font, text_color=text_color, start=start)
 
 def draw_main_screen():
     screen.fill(BG_COLOR)
@@ -254,8 +324,10 @@ def draw_main_screen():
     col_width = table_area.width // 2
     green_area = pygame.Rect(table_area.x, table_area.y, col_width, table_area.height)
     red_area = pygame.Rect(table_area.x + col_width, table_area.y, col_width, table_area.height)
-    draw_team_column(screen, green_area, "Green Team", "Codename", GREEN, GREEN_SUBHEADER, (0, 70, 0), players_table["green"], FONT, WHITE)
-    draw_team_column(screen, red_area, "Red Team", "Codename", RED, RED_SUBHEADER, (100, 0, 0), players_table["red"], FONT, WHITE)
+    draw_team_column(screen, green_area, "Green Team", "Codename", GREEN, GREEN_SUBHEADER, (0, 70, 0), players_table["green"], FONT, WHITE,
+                     entry_pager.start("green", len(players_table["green"])))
+    draw_team_column(screen, red_area, "Red Team", "Codename", RED, RED_SUBHEADER, (100, 0, 0), players_table["red"], FONT, WHITE,
+                     entry_pager.start("red", len(players_table["red"])))
     for widget in main_widgets:
         widget.draw(screen)
 
@@ -277,15 +349,18 @@ def draw_popup():
         header_text = "Update Player Information"
     elif popup_mode == "udp":
         header_text = "Set Game UDP Address"
-    header_surf = FONT.render(header_text, True, WHITE)
+    header_surf = render_text(FONT, header_text, WHITE)
     screen.blit(header_surf, (popup_rect.x + 20, popup_rect.y + 20))
     if popup_mode == "update":
         labels = ["Player ID:", "Codename:", "Equipment ID:", "Team:"]
         for i, widget in enumerate(popup_widgets[:4]):
-            label_surf = FONT.render(labels[i], True, WHITE)
+            label_surf = render_text(FONT, labels[i], WHITE)
             screen.blit(label_surf, (widget.rect.x, widget.rect.y - label_surf.get_height() - 5))
-    if popup_info_text:
-        info_surf = FONT.render(popup_info_text, True, pygame.Color('red'))
+    if pending_db_request is not None:
+        info_surf = render_text(FONT, "Contacting database...", COLOR_INACTIVE)
+        screen.blit(info_surf, (popup_rect.x + 20, popup_rect.bottom - 40))
+    elif popup_info_text:
+        info_surf = render_text(FONT, popup_info_text, pygame.Color('red'))
         screen.blit(info_surf, (popup_rect.x + 20, popup_rect.bottom - 40))
     for widget in popup_widgets:
         widget.draw(screen)
@@ -310,17 +385,14 @@ def add_player_step1_next():
         popup_info_text = "Player ID must be an integer."
         return
     wizard_player_id = int(player_id_str)
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT codename FROM players WHERE id = %s;", (wizard_player_id,))
-        result = cursor.fetchone()
-        wizard_codename = result[0] if result else ""
-        cursor.close()
-        conn.close()
-    else:
+    lookup_codename(wizard_player_id, add_player_step1_done)
+
+def add_player_step1_done(codename, error):
+    global wizard_codename, popup_info_text
+    if error:
         popup_info_text = "Database connection error."
         return
+    wizard_codename = codename or ""
     init_popup_step2()
 
 def init_popup_step2():
@@ -376,38 +448,26 @@ def init_popup_step4():
     set_popup_focus(0)
 
 def add_player_step4_submit(team):
-    global wizard_team, wizard_player_id, wizard_codename, wizard_equipment, players_table, state, popup_info_text
+    global wizard_team
     wizard_team = team
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        create_table_if_not_exists(cursor)
-        conn.commit()
-        cursor.execute("SELECT codename FROM players WHERE id = %s;", (wizard_player_id,))
-        result = cursor.fetchone()
-        if result:
-            if wizard_codename != result[0]:
-                cursor.execute("UPDATE players SET codename = %s WHERE id = %s;", (wizard_codename, wizard_player_id))
-                conn.commit()
-        else:
-            if wizard_codename == "":
-                popup_info_text = "Codename cannot be empty."
-                cursor.close()
-                conn.close()
-                return
-            cursor.execute("INSERT INTO players (id, codename) VALUES (%s, %s);", (wizard_player_id, wizard_codename))
-            conn.commit()
-        cursor.close()
-        conn.close()
-    else:
+    save_codename(wizard_player_id, wizard_codename, add_player_step4_done)
+
+def add_player_step4_done(save_error, error):
+    global players_table, state, popup_info_text
+    if error:
         popup_info_text = "Database connection error."
         return
+    if save_error:
+        popup_info_text = save_error
+        return
     send_udp_message(game_udp_address, wizard_equipment)
-    players_table[wizard_team].append({
+    player = {
         "player_id": str(wizard_player_id),
         "codename": wizard_codename,
         "equipment": str(wizard_equipment)
-    })
+    }
+    players_table[wizard_team].append(player)
+    index_player(roster_index, player, wizard_team)
     popup_info_text = ""
     state = "main"
     set_main_focus(0)
@@ -455,39 +515,31 @@ def update_player_submit():
         popup_info_text = "Team must be 'green' or 'red'."
         return
     player_id = int(player_id_str)
-    equipment = int(equipment_str)
-    conn = get_db_connection()
-    if conn:
-        cursor = conn.cursor()
-        create_table_if_not_exists(cursor)
-        conn.commit()
-        cursor.execute("SELECT codename FROM players WHERE id = %s;", (player_id,))
-        result = cursor.fetchone()
-        if result:
-            if codename != result[0]:
-                cursor.execute("UPDATE players SET codename = %s WHERE id = %s;", (codename, player_id))
-                conn.commit()
-        else:
-            if codename == "":
-                popup_info_text = "Codename cannot be empty."
-                cursor.close()
-                conn.close()
-                return
-            cursor.execute("INSERT INTO players (id, codename) VALUES (%s, %s);", (player_id, codename))
-            conn.commit()
-        cursor.close()
-        conn.close()
-    else:
+    save_codename(player_id, codename,
+                  lambda save_error, error: update_player_done(player_id_str, codename, equipment_str, team,
+                                                               save_error, error))
+
+def update_player_done(player_id_str, codename, equipment_str, team, save_error, error):
+    global players_table, state, popup_info_text
+    if error:
         popup_info_text = "Database connection error."
         return
-    send_udp_message(game_udp_address, equipment)
+    if save_error:
+        popup_info_text = save_error
+        return
+    send_udp_message(game_udp_address, int(equipment_str))
     for team_key in players_table:
+        for p in players_table[team_key]:
+            if p["player_id"] == player_id_str:
+                unindex_player(roster_index, p)
         players_table[team_key] = [p for p in players_table[team_key] if p["player_id"] != player_id_str]
-    players_table[team].append({
+    player = {
         "player_id": player_id_str,
         "codename": codename,
         "equipment": equipment_str
-    })
+    }
+    players_table[team].append(player)
+    index_player(roster_index, player, team)
     popup_info_text = ""
     state = "main"
     set_main_focus(0)
@@ -539,6 +591,47 @@ def start_udp_setting():
 def clear_players():
     global players_table
     players_table = {"green": [], "red": []}
+    roster_index.clear()
+
+def load_roster(path):
+    """
+    Loads a roster file: codenames are bulk-imported into the database on the
+    worker, players that have an equipment ID and team are added to the
+    tables, and their vests are armed in one UDP burst.
+    """
+    try:
+        roster = database.read_roster_file(path)
+    except (OSError, ValueError) as e:
+        log.error("Could not read roster: %s", e)
+        return
+    def imported(future):
+        if future.exception() is not None:
+            log.error("Roster import failed: %s", future.exception())
+            return
+        for entry in roster:
+            codename_cache.remember(entry["id"], entry["codename"])
+        log.info("Imported %d players from %s", future.result(), path)
+    database.get_worker().submit(database.import_players, roster).add_done_callback(imported)
+    equipment_ids = []
+    for entry in roster:
+        if entry["equipment"] is None or entry["team"] is None:
+            continue
+        player_id_str = str(entry["id"])
+        for team_key in players_table:
+            for p in players_table[team_key]:
+                if p["player_id"] == player_id_str:
+                    unindex_player(roster_index, p)
+            players_table[team_key] = [p for p in players_table[team_key] if p["player_id"] != player_id_str]
+        player = {
+            "player_id": player_id_str,
+            "codename": entry["codename"],
+            "equipment": str(entry["equipment"])
+        }
+        players_table[entry["team"]].append(player)
+        index_player(roster_index, player, entry["team"])
+        equipment_ids.append(entry["equipment"])
+    if equipment_ids:
+        send_udp_messages(game_udp_address, equipment_ids)
 
 def start_add_player():
     global state, popup_mode, popup_info_text
@@ -554,17 +647,50 @@ def start_update_player():
     init_update_popup()
     state = "popup"
 
+def write_profile(profiler, filename):
+    """Saves a profiler's per-frame timings under --profile-dir, if one was given."""
+    if not args.profile_dir:
+        return
+    os.makedirs(args.profile_dir, exist_ok=True)
+    path = os.path.join(args.profile_dir, filename)
+    frames = profiler.dump_csv(path)
+    log.info("Frame timings written to %s (%d frames)", path, frames)
+
 def start_game_sequence():
     # Run the countdown first.
     gameStartTimer.run_countdown(screen)
     
-    udp_sock = gameScreen.init_udp_socket()
+    # Every scoring event is written to the game_events table in the background.
+    event_log = database.GameEventLog()
+    event_log.start()
     
-    # Now send the start code so that the traffic generator can start transmitting.
-    send_udp_message(game_udp_address, 202)
+    # The raw UDP stream is journalled so the match can be replayed, unless
+    # journals were turned off with --no-journal or an empty --journal-dir.
+    journal = matchJournal.open_match_journal(args.journal_dir) if args.journal_dir else None
     
-    # Call show_game_screen in the main thread, passing the pre-initialized UDP socket.
-    gameScreen.show_game_screen(screen, players_table["green"], players_table["red"], game_udp_address, udp_sock)
+    # The match is a game session on the default port pair (7501 for hits,
+    # 7500 for codes and ACKs); see gameSession.py to run several arenas.
+    game_profiler = FrameProfiler("game")
+    try:
+        session = GameSession("arena", players_table["green"], players_table["red"], udp_address=game_udp_address,
+                              roster_index=roster_index, event_log=event_log, journal=journal)
+        session.open()
+        
+        # Re-arm every registered vest and send the start code in one burst, so
+        # that the traffic generator can start transmitting.
+        session.send_start()
+        
+        # The game screen runs in the main thread.
+        session.run_on_screen(screen, profiler=game_profiler, fps=args.fps)
+    finally:
+        # Trims the preallocated file even if the match failed.
+        if journal is not None:
+            journal.close()
+    if journal is not None:
+        log.info("Match journal written to %s (%d records)", journal.path, journal.records)
+    write_profile(game_profiler, time.strftime("game-%Y%m%d-%H%M%S.csv"))
+    # The entry screen frame that started the game lasted the whole game.
+    entry_profiler.discard_frame()
     
     global state
     state = "main"
@@ -592,11 +718,54 @@ def move_main_focus_next():
 
 set_main_focus(0)
 
+if args.roster:
+    load_roster(args.roster)
+
+# Times the phases of the entry screen loop; F9 shows the overlay.
+entry_profiler = FrameProfiler("entry")
+
+# Most frames per second the entry screen draws while it is busy.
+ENTRY_FPS = 30
+
+def entry_wait_ms():
+    """
+    How long the entry screen can block waiting for input: not at all while
+    the splash screen, a database request or the profiler overlay needs
+    polling, otherwise until the next page turn, and at most
+    gameScreen.IDLE_TIMEOUT_MS.
+    """
+    if state == "splash" or pending_db_request is not None or entry_profiler.visible:
+        return 0
+    wait = gameScreen.IDLE_TIMEOUT_MS
+    for team, players in players_table.items():
+        seconds = entry_pager.seconds_to_turn(team, len(players))
+        if seconds is not None:
+            wait = min(wait, int(seconds * 1000) + 1)
+    return wait
+
+# The entry screen is only redrawn when something on it changed (input, a
+# finished database request or a page turn); in between it sleeps in
+# pygame.event.wait() rather than redrawing the same frame.
+redraw = True
+drawn_pages = None
+
 while True:
-    for event in pygame.event.get():
+    events = gameScreen.wait_for_events(0 if redraw else entry_wait_ms())
+    entry_profiler.begin_frame()
+    for event in events:
+        redraw = True
         if event.type == pygame.QUIT:
+            codename_cache.stop()
+            database.get_worker().shutdown()
+            write_profile(entry_profiler, "entry.csv")
             pygame.quit()
             sys.exit()
+        if event.type == pygame.KEYDOWN and event.key == PROFILER_HOTKEY:
+            entry_profiler.toggle()
+            continue
+        if event.type == pygame.KEYDOWN and event.key == gameScreen.TRACE_HOTKEY:
+            log.info("Verbose trace %s", "on" if gameLog.toggle_trace() else "off")
+            continue
         if state == "main":
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_TAB:
@@ -606,6 +775,9 @@ while True:
                     start_game_sequence()
                 if event.key == pygame.K_F12:
                     clear_players()
+                if event.key in gameScreen.PAGE_KEYS:
+                    for team in players_table:
+                        entry_pager.turn(team, gameScreen.PAGE_KEYS[event.key])
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 for i, widget in enumerate(main_widgets):
                     if widget.rect.collidepoint(event.pos):
@@ -614,7 +786,7 @@ while True:
                         break
             for widget in main_widgets:
                 widget.handle_event(event)
-        elif state == "popup":
+        elif state == "popup" and pending_db_request is None:
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_TAB:
                     move_focus_next()
@@ -634,6 +806,11 @@ while True:
                         break
         elif state == "game":
             pass
+    entry_profiler.mark("events")
+    # Apply the result of a finished database request, if any.
+    if poll_db_request():
+        redraw = True
+    entry_profiler.mark("database")
     if state == "splash":
         if splash_start_time is None:
             splash_start_time = pygame.time.get_ticks()
@@ -645,12 +822,30 @@ while True:
         if current_time - splash_start_time >= 3000:
             state = "main"
             set_main_focus(0)
+            redraw = True
         pygame.display.flip()
-        CLOCK.tick(30)
+        CLOCK.tick(ENTRY_FPS)
+        entry_profiler.discard_frame()
+        continue
+    pages = tuple(entry_pager.start(team, len(players)) for team, players in players_table.items())
+    if pages != drawn_pages:
+        redraw = True
+    if not (redraw or entry_profiler.visible):
+        # Nothing changed, so there is no frame to draw.
+        entry_profiler.discard_frame()
+        CLOCK.tick(ENTRY_FPS)
         continue
+    redraw = False
+    drawn_pages = pages
     if state == "main":
         draw_main_screen()
     elif state == "popup":
         draw_popup()
+    entry_profiler.mark("draw")
+    entry_profiler.draw_overlay(screen)
+    entry_profiler.mark("overlay")
     pygame.display.flip()
-    CLOCK.tick(30)
+    entry_profiler.mark("display")
+    CLOCK.tick(ENTRY_FPS)
+    entry_profiler.mark("wait")
+    entry_profiler.end_frame()
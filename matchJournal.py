@@ -0,0 +1,206 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import gameLog
+from gameEngine import GameEngine, ManualClock
+from hit_message import decode_batch, is_binary_hit
+from udp_receiver import Transmission, parse_message
+
+log = gameLog.get_logger("matchJournal")
+
+# Append-only journal of the raw datagrams received during a match.
+# Layout (network byte order):
+#   header  4s Q        JOURNAL_MAGIC, end offset of the last complete record
+#   record  Q B I data  arrival time (time.monotonic_ns()), record kind,
+#                       payload length, payload
+# The end offset is rewritten after every record, so a journal left behind by
+# a crash can still be read up to its last complete record.
+JOURNAL_MAGIC = b"PHJ2"
+HEADER_STRUCT = struct.Struct("!4sQ")
+RECORD_STRUCT = struct.Struct("!QBI")
+
+# Record kinds.
+#   KIND_DATAGRAM: a datagram exactly as read from the game socket.
+#   KIND_ROSTER:   the two teams as JSON, written when the match starts; its
+#                  timestamp is the match start time.
+#   KIND_BASE:     a base event generated locally rather than received,
+#                  as "equipment:code" text.
+KIND_DATAGRAM = 0
+KIND_ROSTER = 1
+KIND_BASE = 2
+
+# Space preallocated for a new journal; doubled whenever it fills up.
+INITIAL_SIZE = 4 * 1024 * 1024
+
+DEFAULT_JOURNAL_DIR = "journals"
+
+class MatchJournal:
+    """
+    Writes a match journal through a memory map over a preallocated file, so
+    appending a record is a couple of memory copies rather than a system call.
+    Safe to append from the receiver thread and the render loop at once.
+    """
+    def __init__(self, path, initial_size=INITIAL_SIZE):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "w+b")
+        self._file.truncate(initial_size)
+        self._map = mmap.mmap(self._file.fileno(), initial_size)
+        self._offset = HEADER_STRUCT.size
+        HEADER_STRUCT.pack_into(self._map, 0, JOURNAL_MAGIC, self._offset)
+
+    def append(self, data, arrival_ns=None, kind=KIND_DATAGRAM):
+        """Appends one record. data may be bytes, bytearray or a memoryview."""
+        if arrival_ns is None:
+            arrival_ns = time.monotonic_ns()
+        length = len(data)
+        with self._lock:
+            if self._map is None:
+                return
+            end = self._offset + RECORD_STRUCT.size + length
+            if end > len(self._map):
+                self._grow(end)
+            RECORD_STRUCT.pack_into(self._map, self._offset, arrival_ns, kind, length)
+            self._map[self._offset + RECORD_STRUCT.size:end] = data
+            self._offset = end
+            HEADER_STRUCT.pack_into(self._map, 0, JOURNAL_MAGIC, end)
+            self.records += 1
+
+    def write_roster(self, green_team, red_team, start_ns=None):
+        """Records the teams the match is played with; start_ns marks the match start."""
+        fields = ("player_id", "codename", "equipment")
+        roster = {team: [{key: player.get(key) for key in fields} for player in players]
+                  for team, players in (("green", green_team), ("red", red_team))}
+        self.append(json.dumps(roster).encode("utf-8"), start_ns, KIND_ROSTER)
+
+    def write_base(self, equipment, code, arrival_ns=None):
+        self.append(f"{equipment}:{code}".encode("utf-8"), arrival_ns, KIND_BASE)
+
+    def _grow(self, needed):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def close(self):
+        """Flushes the journal and trims the file to the records written."""
+        with self._lock:
+            if self._map is None:
+                return
+            self._map.flush()
+            self._map.close()
+            self._map = None
+            self._file.truncate(self._offset)
+            self._file.close()
+
+def open_match_journal(directory=DEFAULT_JOURNAL_DIR, suffix=""):
+    """
+    Creates a new journal in directory, named after the current time plus
+    suffix (e.g. "-arena1" when several arenas start at once).
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, time.strftime("match-%Y%m%d-%H%M%S") + suffix + ".phj")
+    return MatchJournal(path)
+
+def read_journal(path):
+    """Yields (arrival_ns, kind, payload) for each record in a journal file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER_STRUCT.size:
+        raise ValueError(f"{path} is not a match journal")
+    magic, end = HEADER_STRUCT.unpack_from(data, 0)
+    if magic != JOURNAL_MAGIC:
+        raise ValueError(f"{path} is not a match journal")
+    view = memoryview(data)
+    offset = HEADER_STRUCT.size
+    end = min(end, len(data))
+    while offset + RECORD_STRUCT.size <= end:
+        arrival_ns, kind, length = RECORD_STRUCT.unpack_from(data, offset)
+        offset += RECORD_STRUCT.size
+        yield arrival_ns, kind, view[offset:offset + length]
+        offset += length
+
+def datagram_transmissions(arrival, payload):
+    """
+    Parses a journalled datagram the way UdpReceiver does and returns the
+    Transmissions it carries (none if it is not a hit event).
+    """
+    if is_binary_hit(payload, len(payload)):
+        return [Transmission(arrival, shooter, target, None, seq, code, sent_us)
+                for shooter, target, code, seq, sent_us in decode_batch(payload, 1)]
+    text = bytes(payload).decode("utf-8", errors="replace")
+    parsed = parse_message(text)
+    if parsed is None:
+        return []
+    return [Transmission(arrival, parsed[0], parsed[1], text, None)]
+
+def replay(path, speed=None):
+    """
+    Feeds a journal back through a headless GameEngine and returns
+    (engine, seconds taken).
+
+    The engine's clock follows the recorded arrival times. With speed=None
+    records are applied as fast as possible; otherwise replay is paced to
+    speed times real time (1.0 for real time).
+    """
+    clock = ManualClock()
+    engine = None
+    by_equipment = {}
+    match_start = None
+    started = time.perf_counter()
+    for arrival_ns, kind, payload in read_journal(path):
+        arrival = arrival_ns / 1e9
+        if kind == KIND_ROSTER:
+            roster = json.loads(bytes(payload))
+            clock.now = match_start = arrival
+            engine = GameEngine(roster["green"], roster["red"], clock=clock)
+            by_equipment = {str(p["equipment"]): p for p in roster["green"] + roster["red"]}
+            engine.start()
+            continue
+        if engine is None:
+            raise ValueError(f"{path} has no roster record before its first event")
+        if speed:
+            wait = (arrival - match_start) / speed - (time.perf_counter() - started)
+            if wait > 0:
+                time.sleep(wait)
+        clock.now = arrival
+        if kind == KIND_BASE:
+            equipment, code = bytes(payload).decode("utf-8").split(":")
+            player = by_equipment.get(equipment)
+            if player is not None:
+                engine.apply_base(player, int(code))
+        elif kind == KIND_DATAGRAM:
+            for transmission in datagram_transmissions(arrival, payload):
+                engine.apply(transmission)
+    if engine is not None:
+        engine.finish()
+    return engine, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a match journal through the scoring engine.")
+    parser.add_argument("journal", help="journal file written by the game screen")
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--realtime", action="store_true", help="replay at the recorded pace")
+    pace.add_argument("--speed", type=float, help="replay at this multiple of the recorded pace")
+    parser.add_argument("--verbose", action="store_true", help="log each scoring event")
+    args = parser.parse_args()
+    if args.verbose:
+        gameLog.set_level(gameLog.TRACE_LEVEL)
+    speed = 1.0 if args.realtime else args.speed
+    engine, elapsed = replay(args.journal, speed)
+    if engine is None:
+        log.warning("Journal contains no match.")
+        return
+    log.info("Replayed %d hits in %.3f s", engine.hits_processed, elapsed)
+    log.info("Final score: green %d, red %d", engine.scoreboard.total("green"), engine.scoreboard.total("red"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+def build_roster_index(green_team, red_team):
+    """
+    Builds a lookup table mapping each equipment ID to a (player, team) pair,
+    where team is "green" or "red".
+    Hit resolution can then find a player with a single dictionary lookup
+    instead of scanning both teams. IDs are indexed as strings and, when
+    numeric, also as ints, so text and binary hit events resolve directly.
+    """
+    index = {}
+    for player in green_team:
+        index_player(index, player, "green")
+    for player in red_team:
+        index_player(index, player, "red")
+    return index
+
+def index_keys(equipment):
+    """Returns the keys an equipment ID is indexed under."""
+    key = str(equipment)
+    if key.isdigit():
+        return (key, int(key))
+    return (key,)
+
+def index_player(index, player, team):
+    """Adds (or replaces) a player's entry in the roster index."""
+    for key in index_keys(player.get("equipment")):
+        index[key] = (player, team)
+
+def unindex_player(index, player):
+    """Removes a player's entry from the roster index if it still points at that player."""
+    for key in index_keys(player.get("equipment")):
+        entry = index.get(key)
+        if entry is not None and entry[0] is player:
+            del index[key]
+
+def lookup(index, equip):
+    """Returns the (player, team) entry for an equipment ID (str or int), or None."""
+    entry = index.get(equip)
+    if entry is None and not isinstance(equip, str):
+        entry = index.get(str(equip))
+    return entry
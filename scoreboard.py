@@ -0,0 +1,77 @@
+from bisect import bisect_left, bisect_right
+
+class Scoreboard:
+    """
+    Keeps team totals and a per-team ranking (highest points first) up to date
+    as individual scores change, so the game screen can read them every frame
+    without re-summing or re-sorting the teams.
+    All point changes must go through add_points() for the totals to stay correct.
+    """
+    def __init__(self, green_team, red_team):
+        self.teams = {"green": green_team, "red": red_team}
+        self.totals = {}
+        self._rankings = {}
+        self._keys = {}
+        for team, players in self.teams.items():
+            self.rebuild(team)
+
+    def rebuild(self, team):
+        """Recomputes the total and ranking for a team from scratch."""
+        players = self.teams[team]
+        ranking = sorted(players, key=lambda p: p.get("points", 0), reverse=True)
+        self._rankings[team] = ranking
+        self._keys[team] = [-p.get("points", 0) for p in ranking]
+        self.totals[team] = sum(p.get("points", 0) for p in players)
+
+    def add_player(self, player, team):
+        """Adds a player to a team and places them in the ranking."""
+        self.teams[team].append(player)
+        self._insert(team, player)
+        self.totals[team] += player.get("points", 0)
+
+    def add_points(self, player, team, delta):
+        """Changes a player's points by delta and updates the team total and ranking."""
+        self._remove(team, player)
+        player["points"] = player.get("points", 0) + delta
+        self._insert(team, player)
+        self.totals[team] += delta
+
+    def ranking(self, team):
+        """Returns the team's players ordered from highest to lowest score."""
+        return self._rankings[team]
+
+    def window(self, team, start, count):
+        """Returns the players ranked start + 1 to start + count, without copying the rest of the ranking."""
+        return self._rankings[team][start:start + count]
+
+    def size(self, team):
+        return len(self._rankings[team])
+
+    def total(self, team):
+        return self.totals[team]
+
+    def leader(self):
+        """Returns "green" or "red" for the team in front, or None when tied."""
+        if self.totals["green"] > self.totals["red"]:
+            return "green"
+        if self.totals["red"] > self.totals["green"]:
+            return "red"
+        return None
+
+    def _insert(self, team, player):
+        key = -player.get("points", 0)
+        keys = self._keys[team]
+        i = bisect_right(keys, key)
+        keys.insert(i, key)
+        self._rankings[team].insert(i, player)
+
+    def _remove(self, team, player):
+        key = -player.get("points", 0)
+        keys = self._keys[team]
+        ranking = self._rankings[team]
+        i = bisect_left(keys, key)
+        while i < len(ranking) and ranking[i] is not player:
+            i += 1
+        if i < len(ranking):
+            del keys[i]
+            del ranking[i]
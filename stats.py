@@ -0,0 +1,142 @@
+import math
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile (pct from 0 to 100) of an already sorted list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(values):
+    """Returns the count, p50, p95, p99 and max of a list of samples."""
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else None,
+    }
+
+def format_summary(summary, scale=1000.0, unit="ms"):
+    """Formats a summarize() result of times in seconds, e.g. "p50 1.20 ms, ... (n=500)"."""
+    if not summary["count"]:
+        return "no samples"
+    parts = [f"{key} {summary[key] * scale:.2f} {unit}" for key in ("p50", "p95", "p99", "max")]
+    return ", ".join(parts) + f" (n={summary['count']})"
+
+class LatencyHistogram:
+    """
+    Counts samples (times in seconds) in fixed log-scale buckets, so memory
+    stays constant however long a match runs. Percentiles are read back to
+    within BUCKET_RATIO of the true value; the max is kept exactly.
+    """
+    LOWEST = 1e-6
+    HIGHEST = 100.0
+    BUCKET_RATIO = 1.01
+    _LOG_RATIO = math.log(BUCKET_RATIO)
+    BUCKETS = math.ceil(math.log(HIGHEST / LOWEST) / _LOG_RATIO) + 1
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.max = None
+
+    @classmethod
+    def bucket(cls, value):
+        """Index of the bucket holding value; out-of-range values go to the end buckets."""
+        if value <= cls.LOWEST:
+            return 0
+        return min(int(math.log(value / cls.LOWEST) / cls._LOG_RATIO), cls.BUCKETS - 1)
+
+    @classmethod
+    def bucket_value(cls, index):
+        """The value a bucket reports: the geometric middle of its range."""
+        return cls.LOWEST * cls.BUCKET_RATIO ** (index + 0.5)
+
+    def add(self, value, count=1):
+        self.counts[self.bucket(value)] += count
+        self.count += count
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, pct):
+        """Nearest-rank percentile (pct from 0 to 100), or None if there are no samples."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_value(index), self.max)
+
+    def summary(self):
+        """Same keys as summarize(): count, p50, p95, p99 and max."""
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+class LatencyTracker:
+    """
+    Records how long hit events take to get through the game screen, from
+    the time.monotonic() arrival stamped on each Transmission when it was
+    read from the socket:
+      - drained: until the render loop took it from the receiver queue
+      - scored: until the engine had applied it
+      - displayed: until the frame showing it had been pushed to the display
+    Pass displayed=False when nothing is drawn (a headless match); the
+    displayed stage is then not tracked.
+
+    Each stage is a LatencyHistogram. Events waiting to be displayed are
+    bucketed by their age at the first scored() call of the frame, so they
+    take no more room than one histogram either.
+    """
+    STAGES = ("drained", "scored", "displayed")
+
+    def __init__(self, displayed=True):
+        stages = self.STAGES if displayed else self.STAGES[:-1]
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+        self.track_displayed = displayed
+        # Bucket of (reference - arrival) -> events, for events not yet displayed.
+        self._undisplayed = {}
+        self._reference = None
+        self._oldest = None
+
+    def drained(self, arrivals, now):
+        histogram = self.histograms["drained"]
+        for arrival in arrivals:
+            histogram.add(now - arrival)
+
+    def scored(self, arrival, now):
+        self.histograms["scored"].add(now - arrival)
+        if self.track_displayed:
+            if self._reference is None:
+                # Every event scored this frame arrived before now.
+                self._reference = now
+                self._oldest = arrival
+            bucket = LatencyHistogram.bucket(self._reference - arrival)
+            self._undisplayed[bucket] = self._undisplayed.get(bucket, 0) + 1
+            self._oldest = min(self._oldest, arrival)
+
+    def displayed(self, now):
+        """Marks every event scored since the last call as visible."""
+        if self._undisplayed:
+            histogram = self.histograms["displayed"]
+            shift = now - self._reference
+            for bucket, count in self._undisplayed.items():
+                histogram.add(shift + LatencyHistogram.bucket_value(bucket), count)
+            # The oldest event gives the exact max for this frame.
+            histogram.max = max(histogram.max, now - self._oldest)
+            self._undisplayed.clear()
+            self._reference = None
+
+    def summary(self):
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def report_lines(self):
+        return [f"arrival -> {stage}: {format_summary(summary)}" for stage, summary in self.summary().items()]
@@ -0,0 +1,60 @@
+import pygame
+from collections import OrderedDict
+
+class TextCache:
+    """
+    Bounded LRU cache of rendered text surfaces keyed by (font, text, color, antialias).
+    Scoreboard rows, scores and the timer only change a few times a second,
+    so most frames can reuse a surface instead of rasterizing the text again.
+    """
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def stats(self):
+        """Returns a dict with the current size and hit/miss counters."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+# Fonts are loaded once per (name, size) and shared by every screen.
+_fonts = {}
+
+# Shared cache used by the entry screen and the game screen.
+text_cache = TextCache()
+
+def get_font(size, name=None):
+    """Returns the shared pygame Font for the given file name (None = default font) and size."""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
+
+def render_text(font, text, color, antialias=True):
+    """Renders text through the shared cache. The returned surface must not be modified."""
+    return text_cache.render(font, text, color, antialias)
@@ -1,77 +1,291 @@
+import argparse
+import itertools
+import select
 import socket
 import random
 import time
 
+import gameLog
+from hit_message import encode_hit
+from udp_receiver import parse_acks
+from stats import summarize, format_summary
+
 bufferSize  = 1024
 serverAddressPort   = ("127.0.0.1", 7500)
 clientAddressPort   = ("127.0.0.1", 7501)
 
+# Acknowledgement handling in load mode.
+#   ACK_NONE: fire and forget; ACKs are collected as they arrive between sends.
+#   ACK_LOCKSTEP: wait for each message's ACK (or a timeout) before the next send.
+ACK_NONE = "none"
+ACK_LOCKSTEP = "lockstep"
 
-print('this program will generate some test traffic for 2 players on the red ')
-print('team as well as 2 players on the green team')
-print('')
+log = gameLog.get_logger("trafficGenerator")
 
-red1 = input('Enter equipment id of red player 1 ==> ')
-red2 = input('Enter equipment id of red player 2 ==> ')
-green1 = input('Enter equipment id of green player 1 ==> ')
-green2 = input('Enter equipment id of green player 2 ==> ')
+def positive(convert):
+	"""argparse type that converts with convert and rejects values <= 0."""
+	def check(text):
+		value = convert(text)
+		if value <= 0:
+			raise argparse.ArgumentTypeError(f"must be greater than 0, got {text}")
+		return value
+	check.__name__ = convert.__name__
+	return check
 
-# Create datagram sockets
-UDPServerSocketReceive = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
-UDPClientSocketTransmit = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+def build_parser():
+	parser = argparse.ArgumentParser(description="Generate test traffic for the game software.")
+	parser.add_argument("--binary", action="store_true",
+	                    help="send hit events in the compact binary format instead of 'shooter:target' text")
+	parser.add_argument("--host", default=clientAddressPort[0], help="address of the game software (default 127.0.0.1)")
+	parser.add_argument("--game-port", type=int, default=clientAddressPort[1],
+	                    help="port the game software receives hits on (default 7501)")
+	parser.add_argument("--ack-port", type=int, default=serverAddressPort[1],
+	                    help="local port ACKs and game codes are received on (default 7500)")
+	parser.add_argument("--log-level", default="INFO", help="logging level (default INFO)")
+	load = parser.add_argument_group("load mode", "non-interactive, high-rate traffic (enabled by --load)")
+	load.add_argument("--load", action="store_true", help="run the scripted load mode instead of prompting")
+	load.add_argument("--green-players", type=int, default=2, help="players on the green team (default 2)")
+	load.add_argument("--red-players", type=int, default=2, help="players on the red team (default 2)")
+	load.add_argument("--first-id", type=int, default=1,
+	                  help="equipment ID of the first green player; the rest follow consecutively, green then red")
+	load.add_argument("--rate", type=positive(float), default=1000.0, help="target events per second (default 1000)")
+	load.add_argument("--burst", type=positive(int), default=1,
+	                  help="send events back to back in bursts of this size, keeping the average rate (default 1)")
+	load.add_argument("--ack", choices=(ACK_NONE, ACK_LOCKSTEP), default=ACK_NONE,
+	                  help="fire and forget, or wait for each ACK before the next send (default none)")
+	load.add_argument("--ack-timeout", type=float, default=1.0, help="seconds to wait for an ACK in lockstep mode")
+	load.add_argument("--base-chance", type=float, default=0.01, help="probability that an event is a base hit")
+	load.add_argument("--duration", type=float, default=10.0, help="seconds to send for (default 10)")
+	load.add_argument("--seed", type=int, help="random seed, for a repeatable event sequence")
+	load.add_argument("--no-wait", action="store_true", help="start immediately instead of waiting for code 202")
+	return parser
 
-# bind server socket
-UDPServerSocketReceive.bind(serverAddressPort)
+def parse_args(argv=None):
+	return build_parser().parse_args(argv)
 
-# wait for start from game software
-print ("")
-print ("waiting for start from game_software")
+def wait_for_start(receive_socket):
+	"""Blocks until the game software sends the start code (202)."""
+	log.info("waiting for start from game_software")
+	received_data = ' '
+	while received_data != '202':
+		received_data, address = receive_socket.recvfrom(bufferSize)
+		received_data = received_data.decode('utf-8')
+		log.info("Received from game software: %s", received_data)
 
-received_data = ' '
-while received_data != '202':
-	received_data, address = UDPServerSocketReceive.recvfrom(bufferSize)
-	received_data = received_data.decode('utf-8')
-	print ("Received from game software: " + received_data)
-print ('')
+def encode_message(message, seq, binary):
+	if binary:
+		shooter, target = message.split(":")
+		return encode_hit(shooter, target, seq)
+	return str.encode(str(message))
 
-# create events, random player and order
-counter = 0
+def run_interactive(args):
+	print('this program will generate some test traffic for 2 players on the red ')
+	print('team as well as 2 players on the green team')
+	print('')
 
-while True:
-	if random.randint(1,2) == 1:
-		redplayer = red1
-	else:
-		redplayer = red2
+	red1 = input('Enter equipment id of red player 1 ==> ')
+	red2 = input('Enter equipment id of red player 2 ==> ')
+	green1 = input('Enter equipment id of green player 1 ==> ')
+	green2 = input('Enter equipment id of green player 2 ==> ')
+
+	# Create datagram sockets
+	UDPServerSocketReceive = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+	UDPClientSocketTransmit = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+
+	# bind server socket
+	UDPServerSocketReceive.bind((serverAddressPort[0], args.ack_port))
+
+	# wait for start from game software
+	wait_for_start(UDPServerSocketReceive)
+
+	# create events, random player and order
+	counter = 0
+
+	while True:
+		if random.randint(1,2) == 1:
+			redplayer = red1
+		else:
+			redplayer = red2
+
+		if random.randint(1,2) == 1:
+			greenplayer = green1
+		else:
+			greenplayer = green2
+
+		if random.randint(1,2) == 1:
+			message = str(redplayer) + ":" + str(greenplayer)
+		else:
+			message = str(greenplayer) + ":" + str(redplayer)
+
+		# after 10 iterations, send base hit
+		if counter == 10:
+			message = str(redplayer) + ":43"
+		if counter == 20:
+			message = str(greenplayer) + ":53"
+
+		log.info("transmitting to game: %s", message)
+
+		UDPClientSocketTransmit.sendto(encode_message(message, counter + 1, args.binary), (args.host, args.game_port))
+		# receive answer from game softare
+
+
+		received_data, address = UDPServerSocketReceive.recvfrom(bufferSize)
+		received_data = received_data.decode('utf-8')
+		log.info("Received from game software: %s", received_data)
+		counter = counter + 1;
+		if received_data == '221':
+			break;
+		time.sleep(random.randint(1,3))
+
+	log.info("program complete")
+
+def random_event(rng, green, red, base_chance):
+	"""Returns a random "shooter:target" message between (or within) the two teams."""
+	shooter_team, target_team = (green, red) if rng.random() < 0.5 else (red, green)
+	shooter = rng.choice(shooter_team)
+	if rng.random() < base_chance:
+		return f"{shooter}:{53 if shooter_team is green else 43}"
+	return f"{shooter}:{rng.choice(target_team)}"
+
+class AckTracker:
+	"""
+	Matches ACKs to sent messages and records round-trip times.
+	Binary messages carry our sequence number, so with by_sequence the
+	numbers in batched "ACK:<seqs>" datagrams are matched exactly. Text
+	messages carry none, so otherwise every ACK answers the oldest messages
+	still waiting (one per number it carries, or one for a plain "ACK").
+	A plain "ACK" is always matched to the oldest message still waiting.
+	"""
+	def __init__(self, by_sequence=False):
+		self.by_sequence = by_sequence
+		self.outstanding = {}
+		self.round_trips = []
+		self.acked = 0
+		self.game_over = False
+
+	def sent(self, seq):
+		self.outstanding[seq] = time.perf_counter()
+
+	def handle(self, payload):
+		now = time.perf_counter()
+		if payload == "221":
+			self.game_over = True
+			return
+		seqs = parse_acks(payload)
+		if not self.by_sequence or payload == "ACK":
+			count = max(1, len(seqs)) if payload.startswith("ACK") else 0
+			seqs = list(itertools.islice(self.outstanding, count))
+		for seq in seqs:
+			sent_at = self.outstanding.pop(seq, None)
+			if sent_at is not None:
+				self.acked += 1
+				self.round_trips.append(now - sent_at)
+
+	def drain(self, sock, timeout):
+		"""
+		Waits up to timeout seconds for sock to become readable and handles
+		every datagram waiting on it. Returns the number handled.
+		"""
+		readable, _, _ = select.select([sock], [], [], max(0, timeout))
+		handled = 0
+		while readable:
+			try:
+				data, address = sock.recvfrom(bufferSize)
+			except BlockingIOError:
+				break
+			self.handle(data.decode('utf-8', errors='replace'))
+			handled += 1
+		return handled
+
+def run_load(args, verbose=True):
+	"""
+	Sends random hit events at a target rate for a fixed duration and reports
+	how many were acknowledged and the ACK round-trip latency.
+	Returns the results as a dict (see trafficSwarm.py); with verbose=False
+	nothing is logged.
+	"""
+	rng = random.Random(args.seed)
+	green = [str(args.first_id + i) for i in range(args.green_players)]
+	red = [str(args.first_id + args.green_players + i) for i in range(args.red_players)]
+	if not green or not red:
+		raise SystemExit("Both teams need at least one player.")
+
+	receive_socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+	receive_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+	receive_socket.bind((serverAddressPort[0], args.ack_port))
+	transmit_socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+	game_address = (args.host, args.game_port)
+
+	if verbose:
+		log.info("Load mode: green %s-%s, red %s-%s, %g events/s in bursts of %d, ACK %s, %g s",
+		         green[0], green[-1], red[0], red[-1], args.rate, args.burst, args.ack, args.duration)
+	if not args.no_wait:
+		wait_for_start(receive_socket)
+	receive_socket.setblocking(False)
+
+	tracker = AckTracker(by_sequence=args.binary)
+	timeouts = 0
+	errors = 0
+	sent = 0
+	burst_interval = args.burst / args.rate
+	start = time.perf_counter()
+	end = start + args.duration
+	while not tracker.game_over:
+		# Events go out in bursts of args.burst; burst k is due at start + k * burst_interval.
+		due = start + (sent // args.burst) * burst_interval
+		now = time.perf_counter()
+		if due >= end or now >= end:
+			break
+		if due > now:
+			tracker.drain(receive_socket, due - now)
+			continue
+		seq = sent + 1
+		message = random_event(rng, green, red, args.base_chance)
+		try:
+			transmit_socket.sendto(encode_message(message, seq, args.binary), game_address)
+		except OSError:
+			errors += 1
+		sent += 1
+		tracker.sent(seq)
+		if args.ack == ACK_LOCKSTEP:
+			deadline = time.perf_counter() + args.ack_timeout
+			while seq in tracker.outstanding and not tracker.game_over and time.perf_counter() < deadline:
+				tracker.drain(receive_socket, deadline - time.perf_counter())
+			if seq in tracker.outstanding:
+				timeouts += 1
+	elapsed = time.perf_counter() - start
+	# Give the last ACKs a moment to arrive.
+	linger_end = time.perf_counter() + 0.5
+	while tracker.outstanding and not tracker.game_over and time.perf_counter() < linger_end:
+		tracker.drain(receive_socket, linger_end - time.perf_counter())
+
+	receive_socket.close()
+	transmit_socket.close()
 
-	if random.randint(1,2) == 1:
-		greenplayer = green1
-	else: 
-		greenplayer = green2	
+	results = {
+		"sent": sent,
+		"acked": tracker.acked,
+		"unacked": len(tracker.outstanding),
+		"timeouts": timeouts,
+		"errors": errors,
+		"elapsed": elapsed,
+		"round_trips": tracker.round_trips,
+		"game_over": tracker.game_over,
+	}
+	if verbose:
+		log.info("Sent %d events in %.2f s (%s events/s), %d send errors",
+		         sent, elapsed, f"{sent / elapsed:,.0f}", errors)
+		log.info("Acknowledged %d (%d unacknowledged%s)", tracker.acked, len(tracker.outstanding),
+		         f", {timeouts} lockstep timeouts" if args.ack == ACK_LOCKSTEP else "")
+		log.info("ACK round trip: %s", format_summary(summarize(tracker.round_trips)))
+		if tracker.game_over:
+			log.info("Game software sent 221 (game over)")
+	return results
 
-	if random.randint(1,2) == 1:
-		message = str(redplayer) + ":" + str(greenplayer)
+if __name__ == "__main__":
+	args = parse_args()
+	gameLog.set_level(args.log_level)
+	if args.load:
+		run_load(args)
 	else:
-		message = str(greenplayer) + ":" + str(redplayer)
-		
-	# after 10 iterations, send base hit
-	if counter == 10:
-		message = str(redplayer) + ":43"
-	if counter == 20:
-		message = str(greenplayer) + ":53"
-		
-	print("transmitting to game: " + message)
-	
-	UDPClientSocketTransmit.sendto(str.encode(str(message)), clientAddressPort)
-	# receive answer from game softare
-	
-	
-	received_data, address = UDPServerSocketReceive.recvfrom(bufferSize)
-	received_data = received_data.decode('utf-8')
-	print ("Received from game software: " + received_data)
-	print ('')
-	counter = counter + 1;
-	if received_data == '221':
-		break;
-	time.sleep(random.randint(1,3))
-	
-print("program complete")
\ No newline at end of file
+		run_interactive(args)
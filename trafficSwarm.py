@@ -0,0 +1,66 @@
+import argparse
+import multiprocessing
+import os
+
+import trafficGenerator
+from arena_ports import arena_ports, CODE_PORT
+from stats import summarize, format_summary
+
+DEFAULT_BASE_PORT = CODE_PORT
+
+def run_worker(job):
+    """Runs one load-mode generator in this process and returns its results."""
+    index, argv = job
+    args = trafficGenerator.parse_args(argv)
+    results = trafficGenerator.run_load(args, verbose=False)
+    results["arena"] = index
+    results["game_port"] = args.game_port
+    return results
+
+def worker_argv(index, generator_args, base_port, seed):
+    ack_port, game_port = arena_ports(index, base_port)
+    argv = list(generator_args) + ["--load", "--ack-port", str(ack_port), "--game-port", str(game_port)]
+    if seed is not None:
+        argv += ["--seed", str(seed + index)]
+    return argv
+
+def report(results):
+    """Prints per-arena and combined throughput, loss and ACK latency."""
+    print(f"{'arena':>5} {'port':>6} {'sent':>9} {'acked':>9} {'loss':>7} {'events/s':>10}  ACK round trip")
+    for r in sorted(results, key=lambda r: r["arena"]):
+        loss = 1 - r["acked"] / r["sent"] if r["sent"] else 0.0
+        print(f"{r['arena']:>5} {r['game_port']:>6} {r['sent']:>9} {r['acked']:>9} {loss:>7.2%} "
+              f"{r['sent'] / r['elapsed']:>10,.0f}  {format_summary(summarize(r['round_trips']))}")
+    sent = sum(r["sent"] for r in results)
+    acked = sum(r["acked"] for r in results)
+    elapsed = max(r["elapsed"] for r in results)
+    round_trips = [rtt for r in results for rtt in r["round_trips"]]
+    print("")
+    print(f"Total: {sent} sent, {acked} acknowledged, "
+          f"{(1 - acked / sent) if sent else 0:.2%} loss, {sum(r['errors'] for r in results)} send errors, "
+          f"{sent / elapsed:,.0f} events/s across {len(results)} arenas")
+    print("ACK round trip (all arenas): " + format_summary(summarize(round_trips)))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run several load-mode traffic generators in parallel, one per arena. "
+                    "Options not listed here are passed to each trafficGenerator.py worker "
+                    "(e.g. --rate, --duration, --binary, --ack).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of generator processes, one per arena (default: one per CPU)")
+    parser.add_argument("--base-port", type=int, default=DEFAULT_BASE_PORT,
+                        help="ACK port of arena 0; arena i uses base+2i for ACKs and base+2i+1 for hits")
+    parser.add_argument("--seed", type=int, help="base random seed; arena i uses seed+i")
+    args, generator_args = parser.parse_known_args()
+    # Reject bad generator options here rather than in every worker.
+    trafficGenerator.parse_args(generator_args + ["--load"])
+
+    jobs = [(i, worker_argv(i, generator_args, args.base_port, args.seed)) for i in range(args.workers)]
+    first, last = arena_ports(0, args.base_port), arena_ports(args.workers - 1, args.base_port)
+    print(f"Starting {args.workers} generator(s) on ports {first[0]}-{last[1]}")
+    with multiprocessing.Pool(processes=args.workers) as pool:
+        results = pool.map(run_worker, jobs)
+    report(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import queue
+import select
+import threading
+import time
+from collections import namedtuple
+
+from gameLog import get_logger
+from hit_message import HIT_SIZE, CODE_HIT, is_binary_hit, decode_batch
+
+log = get_logger("udp_receiver")
+
+# A hit event parsed from the traffic generator. arrival is a time.monotonic()
+# timestamp taken as soon as the datagram was read from the socket, and seq is
+# the sender's sequence number (None for text messages, which have none).
+# Text messages carry their equipment IDs as strings and raw holds the decoded
+# text; binary messages (see hit_message.py) carry ints, the event code and
+# the sender's timestamp in microseconds, and have no raw text.
+Transmission = namedtuple("Transmission", ["arrival", "shooter", "target", "raw", "seq", "code", "sent_us"],
+                          defaults=(CODE_HIT, None))
+
+# Largest datagram read from the socket.
+MAX_DATAGRAM = 1024
+# Binary hit events are received back to back into one buffer and decoded
+# together once this many have arrived (or the socket is drained).
+BINARY_BATCH = 256
+
+# Acknowledgement modes.
+#   ACK_PER_MESSAGE: one plain "ACK" datagram per message (the original protocol).
+#   ACK_BATCH: one "ACK:<seqs>" datagram per drain of the socket, listing the
+#              sender sequence numbers of every binary message read in that
+#              drain. Text messages carry no sequence number, so they are
+#              still answered with a plain "ACK" each.
+ACK_PER_MESSAGE = "per-message"
+ACK_BATCH = "batch"
+
+# Keep batched acknowledgements well inside a single 1024-byte receive buffer.
+MAX_ACK_LENGTH = 1000
+
+def format_acks(seqs):
+    """
+    Formats sequence numbers as batched ACK datagram payloads.
+    Consecutive numbers are collapsed into ranges, e.g. [1, 2, 3, 7] -> "ACK:1-3,7".
+    Returns a list of strings, split so that none exceeds MAX_ACK_LENGTH.
+    """
+    runs = []
+    for seq in seqs:
+        if runs and seq == runs[-1][1] + 1:
+            runs[-1][1] = seq
+        else:
+            runs.append([seq, seq])
+    payloads = []
+    current = []
+    length = len("ACK:")
+    for first, last in runs:
+        part = str(first) if first == last else f"{first}-{last}"
+        if current and length + len(part) + 1 > MAX_ACK_LENGTH:
+            payloads.append("ACK:" + ",".join(current))
+            current = []
+            length = len("ACK:")
+        current.append(part)
+        length += len(part) + 1
+    if current:
+        payloads.append("ACK:" + ",".join(current))
+    return payloads
+
+def parse_acks(payload):
+    """
+    Returns the sequence numbers carried by an ACK datagram payload.
+    A plain "ACK" carries none and returns an empty list.
+    """
+    if not payload.startswith("ACK:"):
+        return []
+    seqs = []
+    for part in payload[4:].split(","):
+        if "-" in part:
+            first, last = part.split("-", 1)
+            seqs.extend(range(int(first), int(last) + 1))
+        elif part:
+            seqs.append(int(part))
+    return seqs
+
+def parse_message(incoming):
+    """
+    Parses a "shooter:target" hit message.
+    Returns (shooter_equip, target_equip) as stripped strings, or None if the
+    message is not a hit event.
+    """
+    if ":" not in incoming:
+        return None
+    parts = incoming.split(":")
+    if len(parts) != 2:
+        return None
+    return parts[0].strip(), parts[1].strip()
+
+class UdpReceiver(threading.Thread):
+    """
+    Background thread that reads the game socket as datagrams arrive,
+    acknowledges them, timestamps and parses them, and hands the resulting
+    Transmissions to the render loop through a bounded queue.
+    When the queue is full new events are dropped and counted rather than
+    blocking the socket.
+
+    Datagrams may be "shooter:target" text or binary hit events (see
+    hit_message.py); the format is detected per datagram, so a sender opts
+    into the binary format simply by sending it.
+
+    If a journal (matchJournal.MatchJournal) is given, every datagram is
+    appended to it with its arrival time before it is parsed.
+
+    Text datagrams are answered with a plain "ACK" each. Binary ones carry
+    the sender's sequence number: in ACK_BATCH mode the numbers of every
+    binary message read in one drain of the socket are acknowledged together,
+    and ACK_PER_MESSAGE sends a plain "ACK" for each.
+    """
+    def __init__(self, udp_socket, ack_address=("127.0.0.1", 7500), ack_mode=ACK_BATCH, max_queue=10000,
+                 poll_interval=0.1, journal=None):
+        super().__init__(name="udp-receiver", daemon=True)
+        if ack_mode not in (ACK_PER_MESSAGE, ACK_BATCH):
+            raise ValueError(f"Unknown ACK mode: {ack_mode}")
+        self.udp_socket = udp_socket
+        self.ack_address = ack_address
+        self.ack_mode = ack_mode
+        self.events = queue.Queue(maxsize=max_queue)
+        self.poll_interval = poll_interval
+        self.journal = journal
+        self.received = 0
+        self.dropped = 0
+        self.acks_sent = 0
+        self._buffer = bytearray(BINARY_BATCH * HIT_SIZE + MAX_DATAGRAM)
+        self._view = memoryview(self._buffer)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                readable, _, _ = select.select([self.udp_socket], [], [], self.poll_interval)
+            except (OSError, ValueError):
+                # The socket was closed underneath us.
+                break
+            if readable:
+                self._drain_socket()
+
+    def _drain_socket(self):
+        pending_acks = []
+        binary_count = 0
+        binary_arrivals = []
+        while True:
+            # Each datagram is read straight into the batch buffer; binary hit
+            # events stay there until the batch is decoded in one pass.
+            offset = binary_count * HIT_SIZE
+            try:
+                nbytes, addr = self.udp_socket.recvfrom_into(self._view[offset:offset + MAX_DATAGRAM])
+            except BlockingIOError:
+                break
+            except Exception as e:
+                log.error("UDP recv error: %s", e)
+                break
+            arrival_ns = time.monotonic_ns()
+            arrival = arrival_ns / 1e9
+            self.received += 1
+            if self.journal is not None:
+                self.journal.append(self._view[offset:offset + nbytes], arrival_ns)
+            if is_binary_hit(self._view[offset:], nbytes):
+                binary_arrivals.append(arrival)
+                binary_count += 1
+                if binary_count == BINARY_BATCH:
+                    self._queue_binary(binary_count, binary_arrivals, pending_acks)
+                    binary_count = 0
+                    binary_arrivals = []
+                continue
+            incoming = bytes(self._view[offset:offset + nbytes]).decode('utf-8', errors='replace')
+            log.debug("Received from traffic generator: %s", incoming)
+            if binary_count:
+                # Queue the binary hits that arrived first, so events stay
+                # in arrival order.
+                self._queue_binary(binary_count, binary_arrivals, pending_acks)
+                binary_count = 0
+                binary_arrivals = []
+            # The sender did not number the message, so there is nothing to
+            # batch: it gets a plain "ACK" whatever the mode.
+            self._send_ack("ACK")
+            log.debug("Sent ACK for message: %s", incoming)
+            parsed = parse_message(incoming)
+            if parsed is None:
+                continue
+            try:
+                self.events.put_nowait(Transmission(arrival, parsed[0], parsed[1], incoming, None))
+            except queue.Full:
+                self.dropped += 1
+        if binary_count:
+            self._queue_binary(binary_count, binary_arrivals, pending_acks)
+        if pending_acks:
+            for payload in format_acks(pending_acks):
+                self._send_ack(payload)
+            log.debug("Sent ACK for %d message(s)", len(pending_acks))
+
+    def _queue_binary(self, count, arrivals, pending_acks):
+        """Decodes the binary hit events collected in the batch buffer and queues them."""
+        for arrival, (shooter, target, code, seq, sent_us) in zip(arrivals, decode_batch(self._buffer, count)):
+            if self.ack_mode == ACK_PER_MESSAGE:
+                self._send_ack("ACK")
+            else:
+                pending_acks.append(seq)
+            try:
+                self.events.put_nowait(Transmission(arrival, shooter, target, None, seq, code, sent_us))
+            except queue.Full:
+                self.dropped += 1
+
+    def _send_ack(self, payload):
+        try:
+            self.udp_socket.sendto(payload.encode('utf-8'), self.ack_address)
+            self.acks_sent += 1
+        except OSError as e:
+            log.error("UDP ACK send error: %s", e)
+
+    def drain(self):
+        """Returns every Transmission received since the last call, oldest first."""
+        items = []
+        while True:
+            try:
+                items.append(self.events.get_nowait())
+            except queue.Empty:
+                return items
+
+    def stop(self, timeout=1.0):
+        """Stops the thread and waits for it to exit."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,75 @@
+import socket
+import threading
+
+from gameLog import get_logger
+
+log = get_logger("udp_sender")
+
+BROADCAST_IP = "255.255.255.255"
+
+class UdpSender:
+    """
+    Long-lived UDP sender. One socket is opened per destination the first time
+    it is used (with SO_BROADCAST set once for the broadcast address) and is
+    reused for every later message, instead of creating and closing a socket
+    per send. Keeps counters of what was sent.
+    """
+    def __init__(self):
+        self._sockets = {}
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.bytes_sent = 0
+        self.errors = 0
+
+    def _socket_for(self, target_ip, port):
+        address = (target_ip, port)
+        with self._lock:
+            sock = self._sockets.get(address)
+            if sock is None:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                if target_ip == BROADCAST_IP:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                self._sockets[address] = sock
+            return sock
+
+    def send(self, target_ip, message, port):
+        """Sends one message (str, int or bytes). Returns True on success."""
+        return self.send_batch(target_ip, [message], port) == 1
+
+    def send_batch(self, target_ip, messages, port):
+        """
+        Sends several messages back to back over the destination's socket.
+        Returns the number that were sent successfully.
+        """
+        sock = self._socket_for(target_ip, port)
+        count = 0
+        for message in messages:
+            data = message if isinstance(message, bytes) else str(message).encode()
+            try:
+                sock.sendto(data, (target_ip, port))
+            except OSError as e:
+                self.errors += 1
+                log.error("UDP send error: %s", e)
+                continue
+            count += 1
+            self.bytes_sent += len(data)
+        self.sent += count
+        return count
+
+    def stats(self):
+        return {"sent": self.sent, "bytes_sent": self.bytes_sent, "errors": self.errors,
+                "sockets": len(self._sockets)}
+
+    def close(self):
+        with self._lock:
+            for sock in self._sockets.values():
+                sock.close()
+            self._sockets.clear()
+
+# Shared by the entry screen, the game screen and udp_client. Sockets are only
+# opened when a destination is first used.
+_shared_sender = UdpSender()
+
+def get_sender():
+    """Returns the process-wide UdpSender."""
+    return _shared_sender